@@ -4,30 +4,92 @@ Do The Work - FastHTML Garmin Connect App
 TrainingPeaks-inspired design for displaying Daily Active Calories data
 """
 
+import time
+
+# Import-time instrumentation: every startup phase is timed and logged, so cold
+# starts can be read straight from the function logs
+_MODULE_STARTED = time.perf_counter()
+STARTUP_TIMINGS = {}
+
+def _record_timing(label: str, started: float):
+    """Record and log how long a startup phase took since `started`"""
+    STARTUP_TIMINGS[label] = (time.perf_counter() - started) * 1000
+    print(f"⏱️  {label}: {STARTUP_TIMINGS[label]:.1f} ms")
+
 from fasthtml.common import *
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Tuple
+import itertools
 import json
-import statistics
-from garmin_data import GarminDataExtractor
+import os
+import prefetch
+import profiling
+from assets import PrecompressedStaticFiles, asset_url
+from training_load import TrainingLoadStore
+from intraday import IntradayStore
+
+_record_timing("import fasthtml", _MODULE_STARTED)
+
+# Fingerprinted asset URLs (see assets.py); scripts are deferred so they never block first paint
+css = Link(rel="stylesheet", href=asset_url("style.css"))
+chart_js = Script(src=asset_url("vendor/chart.umd.min.js"), defer=True)
+app_js = Script(src=asset_url("app.js"), defer=True)
 
-# Initialize FastHTML app with custom CSS and JS
-css = Link(rel="stylesheet", href="/static/style.css")
-chart_js = Script(src="https://cdn.jsdelivr.net/npm/chart.js")
-app_js = Script(src="/static/app.js")
+# FastHTML is used directly rather than through fast_app(), which always
+# imports the PicoCSS helpers (and IPython when installed) at startup.
+# Asset tags live only in the layout, so no hdrs are passed here.
+app = FastHTML()
+rt = app.route
 
-app, rt = fast_app(
-    hdrs=[css, chart_js, app_js]
-)
+# Compress HTML and JSON responses; precompressed static files pass through untouched
+from starlette.middleware.gzip import GZipMiddleware
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # Mount static files
-from starlette.staticfiles import StaticFiles
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 
-# Global extractor instance
-extractor = GarminDataExtractor()
+# The Garmin extractor pulls in garminconnect and garth, which dominate import
+# time; it is created on first use so pages like /login never load them
+_extractor = None
 
-def TrainingPeaksLayout(title: str, *content):
-    """TrainingPeaks-inspired layout wrapper"""
+def get_extractor():
+    """Return the global extractor instance, importing garmin_data on first use"""
+    global _extractor
+    if _extractor is None:
+        started = time.perf_counter()
+        from garmin_data import GarminDataExtractor
+        _extractor = GarminDataExtractor()
+        if GARMIN_REPLAY_FILE:
+            # Loaded once per process and shared by every login
+            from garmin_replay import enable_replay
+            enable_replay(_extractor, GARMIN_REPLAY_FILE)
+        if profiling.enabled():
+            profiling.instrument(_extractor, profiling.EXTRACTOR_METHODS)
+        _record_timing("import garmin_data", started)
+    return _extractor
+
+# Per-user running ATL/CTL state, updated incrementally as new days arrive
+training_load_store = TrainingLoadStore()
+
+def _yesterday() -> str:
+    """Last complete day; today's partial total is kept out of the running state"""
+    return date.fromordinal(date.today().toordinal() - 1).isoformat()
+
+# Per-day compressed intraday heart-rate chunks, fetched on first use
+intraday_store = IntradayStore()
+
+# Longest window /api/zones will ingest and aggregate
+MAX_ZONE_DAYS = 90
+
+# Serve recorded Garmin responses instead of the live API (local profiling/load tests)
+GARMIN_REPLAY_FILE = os.environ.get("GARMIN_REPLAY_FILE")
+
+# Marks where per-request content goes when the layout is pre-rendered
+_CONTENT_SLOT = "\x00content\x00"
+
+def _layout_tree(title: str, *content):
+    """TrainingPeaks-inspired layout as a full FT tree"""
     return Html(
         Head(
             Meta(charset="utf-8"),
@@ -53,7 +115,8 @@ def TrainingPeaksLayout(title: str, *content):
             Meta(name="description", content="Garmin Connect analytics inspired by Alan Couzens. Track your daily active calories with 30-day averages, monthly trends, and performance insights."),
             
             css,
-            chart_js
+            chart_js,
+            app_js
         ),
         Body(
             Header(
@@ -70,11 +133,68 @@ def TrainingPeaksLayout(title: str, *content):
                 cls="header"
             ),
             Main(*content, cls="main-content"),
-            app_js,
             cls="training-peaks-theme"
         )
     )
 
+@lru_cache(maxsize=None)
+def _layout_fragments(title: str) -> Tuple[bytes, bytes]:
+    """Render the static layout (head, header, scripts) once per title as byte fragments"""
+    page = to_xml(_layout_tree(title, NotStr(_CONTENT_SLOT)))
+    before, after = page.split(_CONTENT_SLOT)
+    return before.encode(), after.encode()
+
+def render_page(title: str, *content) -> bytes:
+    """Render a full page, building FT components only for the dynamic content"""
+    before, after = _layout_fragments(title)
+    return before + to_xml(content, indent=False).encode() + after
+
+def TrainingPeaksLayout(title: str, *content):
+    """TrainingPeaks-inspired layout wrapper"""
+    with profiling.section("render"):
+        return HTMLResponse(render_page(title, *content))
+
+def LoginCard(error: str = "", username: str = ""):
+    """Login form card, optionally with an error message and prefilled username"""
+    return Div(
+        Div(
+            Div(error, cls="error-message") if error else "",
+            H2("Connect to Garmin", cls="login-title"),
+            P("Enter your Garmin Connect credentials to analyze your training data", cls="login-subtitle"),
+            
+            Form(
+                Div(
+                    Label("Username", fr="username"),
+                    Input(type="email", id="username", name="username", value=username or None,
+                          placeholder="your-email@example.com", required=True),
+                    cls="form-group"
+                ),
+                Div(
+                    Label("Password", fr="password"),
+                    Input(type="password", id="password", name="password", placeholder="Password", required=True),
+                    cls="form-group"
+                ),
+                Button("Connect to Garmin", type="submit", cls="btn-primary btn-login"),
+                method="post",
+                action="/login",
+                cls="login-form"
+            ),
+            
+            Div(
+                P("🔒 Your credentials are used only to fetch your data and are never stored.", cls="security-note"),
+                cls="security-info"
+            ),
+            
+            cls="login-card"
+        ),
+        cls="login-container"
+    )
+
+@lru_cache(maxsize=None)
+def _login_page() -> bytes:
+    """The login page never changes, so it is rendered once"""
+    return render_page("Login", LoginCard())
+
 def StatCard(title: str, value: str, subtitle: str = "", trend: str = ""):
     """TrainingPeaks-style stat card component"""
     trend_class = f"trend-{trend}" if trend else ""
@@ -99,85 +219,30 @@ def get(session):
 @rt("/login")
 def get(session):
     """Login page with TrainingPeaks styling"""
-    return TrainingPeaksLayout(
-        "Login",
-        Div(
-            Div(
-                H2("Connect to Garmin", cls="login-title"),
-                P("Enter your Garmin Connect credentials to analyze your training data", cls="login-subtitle"),
-                
-                Form(
-                    Div(
-                        Label("Username", fr="username"),
-                        Input(type="email", id="username", name="username", placeholder="your-email@example.com", required=True),
-                        cls="form-group"
-                    ),
-                    Div(
-                        Label("Password", fr="password"),
-                        Input(type="password", id="password", name="password", placeholder="Password", required=True),
-                        cls="form-group"
-                    ),
-                    Button("Connect to Garmin", type="submit", cls="btn-primary btn-login"),
-                    method="post",
-                    action="/login",
-                    cls="login-form"
-                ),
-                
-                Div(
-                    P("🔒 Your credentials are used only to fetch your data and are never stored.", cls="security-note"),
-                    cls="security-info"
-                ),
-                
-                cls="login-card"
-            ),
-            cls="login-container"
-        )
-    )
+    return HTMLResponse(_login_page())
 
 @rt("/login")
 def post(username: str, password: str, session):
     """Handle login form submission"""
+    extractor = get_extractor()
     try:
-        # Authenticate with Garmin Connect
-        if extractor.authenticate(username, password):
+        # Authenticate with Garmin Connect; in replay mode the extractor already serves the recording
+        if GARMIN_REPLAY_FILE:
+            authenticated = extractor.authenticated
+        else:
+            authenticated = extractor.authenticate(username, password)
+        
+        if authenticated:
             session['authenticated'] = True
             session['username'] = username
+            # Start fetching now so the data is (mostly) ready when /dashboard loads
+            prefetch.discard(username)
+            prefetch.start_prefetch(username, extractor)
             return RedirectResponse('/dashboard', status_code=303)
         else:
             return TrainingPeaksLayout(
                 "Login",
-                Div(
-                    Div(
-                        Div("❌ Authentication failed. Please check your credentials.", cls="error-message"),
-                        H2("Connect to Garmin", cls="login-title"),
-                        P("Enter your Garmin Connect credentials to analyze your training data", cls="login-subtitle"),
-                        
-                        Form(
-                            Div(
-                                Label("Username", fr="username"),
-                                Input(type="email", id="username", name="username", value=username, required=True),
-                                cls="form-group"
-                            ),
-                            Div(
-                                Label("Password", fr="password"),
-                                Input(type="password", id="password", name="password", required=True),
-                                cls="form-group"
-                            ),
-                            Button("Connect to Garmin", type="submit", cls="btn-primary btn-login"),
-                            method="post",
-                            action="/login",
-                            cls="login-form"
-                        ),
-                        
-                        Div(
-                            P("🔒 Your credentials are used only to fetch your data and are never stored.", cls="security-note"),
-                            cls="security-info"
-                        ),
-                        
-                        cls="login-card"
-                    ),
-                    cls="login-container"
-                )
+                LoginCard(error="❌ Authentication failed. Please check your credentials.", username=username)
             )
     except Exception as e:
         return TrainingPeaksLayout(
@@ -186,40 +251,39 @@ def post(username: str, password: str, session):
         )
 
 @rt("/dashboard")
-def get(session):
+def get(session, req):
+    """Main dashboard, profiled on demand (see profiling.py)"""
+    if not profiling.should_profile(req.headers):
+        return dashboard_page(session)
+    with profiling.RequestProfile("dashboard") as profile:
+        response = dashboard_page(session)
+    if profile.profile_id:
+        response.headers['X-Profile-Id'] = profile.profile_id
+    return response
+
+def dashboard_page(session):
     """Main dashboard with TrainingPeaks-style data visualization"""
     # Redirect to login if user session is not authenticated or backend client lost auth (cold start)
-    if not session.get('authenticated') or not extractor.authenticated:
+    if not session.get('authenticated'):
+        return RedirectResponse('/login')
+    extractor = get_extractor()
+    if not extractor.authenticated:
         return RedirectResponse('/login')
     
     try:
-        # Get data for the last year
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=365)
-        
+        # Attach to the prefetch job started at login (or start one after a cold start)
         print("📊 Fetching dashboard data...")
-        data = extractor.get_daily_active_calories(start_date, end_date)
+        with profiling.section("prefetch wait"):
+            inputs = prefetch.get_dashboard_inputs(session.get('username', ''), extractor)
+        start_date, end_date = inputs['start_date'], inputs['end_date']
+        data = inputs['daily']
         
-        # Calculate metrics
-        avg_30_day_value = extractor.calculate_30_day_average(data)
-        ramp_rate = extractor.calculate_monthly_ramp_rate(data)
-        monthly_data = extractor.get_monthly_averages(data)
-        
-        # Calculate monthly trend in calories as well as percentage
-        if len(data) >= 60:
-            recent_30 = data[-30:]
-            previous_30 = data[-60:-30]
-            recent_calories = [(day.get('active_calories') or 0) for day in recent_30 if (day.get('active_calories') or 0) > 0]
-            previous_calories = [(day.get('active_calories') or 0) for day in previous_30 if (day.get('active_calories') or 0) > 0]
-            
-            if recent_calories and previous_calories:
-                recent_avg = sum(recent_calories) / len(recent_calories)
-                previous_avg = sum(previous_calories) / len(previous_calories)
-                calorie_change = recent_avg - previous_avg
-            else:
-                calorie_change = 0
-        else:
-            calorie_change = 0
+        # Calculate all metrics and insights in a single pass over the daily series
+        insights = extractor.calculate_insights(data)
+        avg_30_day_value = insights['avg_30_day']
+        ramp_rate = insights['ramp_rate']
+        calorie_change = insights['calorie_change']
+        monthly_data = insights['monthly_data']
         
         # Format metrics for display
         avg_30_day = f"{avg_30_day_value:.0f}"
@@ -228,10 +292,8 @@ def get(session):
         ramp_display_percent = f"{ramp_rate:+.1f}%"
         ramp_display_calories = f"{calorie_sign}{calorie_change:.0f} cal/day"
         
-        # Calculate 3-month average for performance level
-        three_month_data = data[-90:] if len(data) >= 90 else data
-        three_month_calories = [(day.get('active_calories') or 0) for day in three_month_data if (day.get('active_calories') or 0) > 0]
-        three_month_avg = sum(three_month_calories) / len(three_month_calories) if three_month_calories else 0
+        # 3-month average for performance level
+        three_month_avg = insights['three_month_avg']
         
         # Determine performance level
         if three_month_avg < 500:
@@ -253,150 +315,207 @@ def get(session):
             performance_level = "Elite/Pro"
             level_color = "#ff6b35"
         
+        # Fitness/fatigue/form from the persisted training-load model (O(new days))
+        with profiling.section("training load"):
+            training_load = training_load_store.update(session.get('username', ''), data, through=_yesterday())
+        
         # Prepare chart data with proper month formatting
         chart_labels = []
         chart_values = [month['average_calories'] for month in monthly_data]
+        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                      'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
         
         for month in monthly_data:
             # Parse YYYY-MM format and convert to "Jan-25" format
             year_month = month['month']
             year, month_num = year_month.split('-')
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
             month_name = month_names[int(month_num) - 1]
             chart_labels.append(f"{month_name}-{year[-2:]}")
         
-        # Calculate annual average for chart line
-        annual_average = sum(chart_values) / len(chart_values) if chart_values else 0
+        # Annual average for chart line
+        annual_average = insights['annual_average']
+        best_month = insights['best_month']
+        biggest_day = insights['biggest_day']
+        percentiles = insights['percentiles']
         
         # Activity calories by type over the last 30 days (average per day, including unlogged portion)
-        activity_breakdown = extractor.get_activity_calories_breakdown(start_date, end_date, data)
+        activity_breakdown = extractor.get_activity_calories_breakdown(
+            start_date, end_date, data, activities=inputs['activities']
+        )
         panel_avg_30 = avg_30_day_value  # exact same source as the 30-day panel
         
-        return TrainingPeaksLayout(
-            "Dashboard",
-            
-            # Welcome section
-            Div(
-                H2(f"Welcome back, {session.get('username', 'Athlete')}", cls="welcome-title"),
-                P(f"Training data from {start_date.strftime('%b %d, %Y')} to {end_date.strftime('%b %d, %Y')}", cls="date-range"),
-                cls="welcome-section"
-            ),
-            
-            # Key metrics cards
-            Div(
-                StatCard(
-                    "30-Day Average",
-                    avg_30_day,
-                    "Active Calories/Day",
+        with profiling.section("json encoding"):
+            chart_labels_json = json.dumps(chart_labels)
+            chart_values_json = json.dumps(chart_values)
+        
+        with profiling.section("build components"):
+            content = (
+                # Welcome section
+                Div(
+                    H2(f"Welcome back, {session.get('username', 'Athlete')}", cls="welcome-title"),
+                    P(f"Training data from {start_date.strftime('%b %d, %Y')} to {end_date.strftime('%b %d, %Y')}", cls="date-range"),
+                    cls="welcome-section"
                 ),
+            
+                # Key metrics cards
                 Div(
-                    Div("Monthly Trend", cls="stat-title"),
-                    Div(ramp_display_percent, cls="stat-value"),
-                    Div(ramp_display_calories, cls="stat-subtitle-secondary"),
+                    StatCard(
+                        "30-Day Average",
+                        avg_30_day,
+                        "Active Calories/Day",
+                    ),
+                    Div(
+                        Div("Monthly Trend", cls="stat-title"),
+                        Div(ramp_display_percent, cls="stat-value"),
+                        Div(ramp_display_calories, cls="stat-subtitle-secondary"),
+                        Div(
+                            "vs Previous 30 Days",
+                            Span(f" {'↗' if ramp_trend == 'up' else '↘' if ramp_trend == 'down' else ''}", cls=f"trend-icon trend-{ramp_trend}") if ramp_trend != "neutral" else "",
+                            cls="stat-subtitle"
+                        ),
+                        cls="stat-card"
+                    ),
                     Div(
-                        "vs Previous 30 Days",
-                        Span(f" {'↗' if ramp_trend == 'up' else '↘' if ramp_trend == 'down' else ''}", cls=f"trend-icon trend-{ramp_trend}") if ramp_trend != "neutral" else "",
-                        cls="stat-subtitle"
+                        Div("Performance Level", cls="stat-title"),
+                        Div(performance_level, cls="stat-value"),
+                        Div(f"{three_month_avg:.0f} cal/day", cls="stat-subtitle-secondary"),
+                        Div("3-Month Average", cls="stat-subtitle"),
+                        cls="stat-card"
                     ),
-                    cls="stat-card"
-                ),
-                Div(
-                    Div("Performance Level", cls="stat-title"),
-                    Div(performance_level, cls="stat-value"),
-                    Div(f"{three_month_avg:.0f} cal/day", cls="stat-subtitle-secondary"),
-                    Div("3-Month Average", cls="stat-subtitle"),
-                    cls="stat-card"
+                    Div(
+                        Div("Fitness", cls="stat-title"),
+                        Div(f"{training_load.ctl:.0f}", cls="stat-value"),
+                        Div(f"Fatigue {training_load.atl:.0f} · Form {training_load.tsb:+.0f}", cls="stat-subtitle-secondary"),
+                        Div("42-Day Load (cal/day)", cls="stat-subtitle"),
+                        cls="stat-card"
+                    ),
+                    cls="metrics-grid"
                 ),
-                cls="metrics-grid"
-            ),
             
-            # Chart section
-            Div(
-                H3("12-Month Active Calories Trend", cls="chart-title"),
+                # Chart section
                 Div(
-                    Canvas(id="caloriesChart", width="400", height="200"),
-                    cls="chart-container"
+                    H3("12-Month Active Calories Trend", cls="chart-title"),
+                    Div(
+                        Div(
+                            Button("Monthly", type="button", data_mode="monthly", cls="chart-toggle active"),
+                            Button("Daily", type="button", data_mode="daily", cls="chart-toggle"),
+                            Button("7-Day Avg", type="button", data_mode="rolling", cls="chart-toggle"),
+                            Button("Fitness", type="button", data_mode="fitness", cls="chart-toggle"),
+                            cls="chart-toggle-group"
+                        ),
+                        Div(
+                            *[Button(label, type="button", data_range=str(days), cls=f"chart-toggle{' active' if days == 365 else ''}")
+                              for label, days in (("3M", 90), ("6M", 180), ("1Y", 365))],
+                            cls="chart-toggle-group chart-range-group"
+                        ),
+                        cls="chart-controls"
+                    ),
+                    Div(
+                        Canvas(id="caloriesChart", width="400", height="200"),
+                        cls="chart-container"
+                    ),
+                    cls="chart-section"
                 ),
-                cls="chart-section"
-            ),
             
-            # Activity calories by type section (30-day avg)
-            Div(
-                H3("Active Calories by Activity Type (30-day avg)", cls="chart-title"),
+                # Activity calories by type section (30-day avg)
                 Div(
-                    f"Percentages reflect share of last-30-day average daily active calories (~ {int(round(panel_avg_30)):,} cal/day).",
-                    cls="activity-note"
+                    H3("Active Calories by Activity Type (30-day avg)", cls="chart-title"),
+                    Div(
+                        f"Percentages reflect share of last-30-day average daily active calories (~ {int(round(panel_avg_30)):,} cal/day).",
+                        cls="activity-note"
+                    ),
+                    Div(
+                        *[
+                            (lambda pct: Div(
+                                Div(item['type'], cls="activity-type"),
+                                Div(
+                                    Div(cls="progress-bar-fill", style=f"width: {pct}%"),
+                                    cls="progress-bar"
+                                ),
+                                Div(
+                                    Span(f"{int(round(item['calories'])):,} cal/day", cls="activity-calories"),
+                                    Span(f"{pct:.1f}% of daily active", cls="activity-percent"),
+                                    cls="activity-stats"
+                                ),
+                                cls="activity-item"
+                            ))(max(0.0, min(100.0, (item['calories'] / panel_avg_30 * 100.0) if panel_avg_30 > 0 else 0.0)))
+                            for item in activity_breakdown.get('by_type', [])
+                        ],
+                        cls="activity-breakdown-grid"
+                    ),
+                    cls="activity-section"
                 ),
+            
+                # Heart-rate zones, loaded after the page from /api/zones
                 Div(
-                    *[
-                        (lambda pct: Div(
-                            Div(item['type'], cls="activity-type"),
-                            Div(
-                                Div(cls="progress-bar-fill", style=f"width: {pct}%"),
-                                cls="progress-bar"
-                            ),
-                            Div(
-                                Span(f"{int(round(item['calories'])):,} cal/day", cls="activity-calories"),
-                                Span(f"{pct:.1f}% of daily active", cls="activity-percent"),
-                                cls="activity-stats"
-                            ),
-                            cls="activity-item"
-                        ))(max(0.0, min(100.0, (item['calories'] / panel_avg_30 * 100.0) if panel_avg_30 > 0 else 0.0)))
-                        for item in activity_breakdown.get('by_type', [])
-                    ],
-                    cls="activity-breakdown-grid"
+                    H3("Time in Heart-Rate Zones (30 days)", cls="chart-title"),
+                    Div("Loading heart-rate data...", id="zone-breakdown", cls="activity-breakdown-grid"),
+                    cls="activity-section"
                 ),
-                cls="activity-section"
-            ),
             
-            # Data insights
-            Div(
-                H3("Insights", cls="insights-title"),
+                # Data insights
                 Div(
+                    H3("Insights", cls="insights-title"),
                     Div(
-                        H4("Best Month"),
-                        P(f"{['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'][int(max(monthly_data, key=lambda x: x['average_calories'])['month'].split('-')[1]) - 1]}-{max(monthly_data, key=lambda x: x['average_calories'])['month'].split('-')[0][-2:]}" if monthly_data else "N/A"),
-                        P(f"{max(monthly_data, key=lambda x: x['average_calories'])['average_calories']:.0f} cal/day" if monthly_data else "No data", cls="insight-value"),
-                        cls="insight-card"
-                    ),
-                    Div(
-                        H4("Biggest Day"),
-                        P(f"{datetime.strptime(max(data, key=lambda x: x.get('active_calories', 0))['date'], '%Y-%m-%d').strftime('%-d-%b-%y') if data else 'N/A'}"),
-                        P(f"{max(data, key=lambda x: x.get('active_calories', 0))['active_calories']:.0f} calories" if data else "No data", cls="insight-value"),
-                        cls="insight-card"
-                    ),
-                    Div(
-                        H4("Annual Average"),
-                        P("12-Month Average"),
-                        P(f"{annual_average:.0f} cal/day", cls="insight-value"),
-                        cls="insight-card"
+                        Div(
+                            H4("Best Month"),
+                            P(f"{month_names[int(best_month['month'].split('-')[1]) - 1]}-{best_month['month'].split('-')[0][-2:]}" if best_month else "N/A"),
+                            P(f"{best_month['average_calories']:.0f} cal/day" if best_month else "No data", cls="insight-value"),
+                            cls="insight-card"
+                        ),
+                        Div(
+                            H4("Biggest Day"),
+                            P(f"{datetime.strptime(biggest_day['date'], '%Y-%m-%d').strftime('%-d-%b-%y') if biggest_day else 'N/A'}"),
+                            P(f"{biggest_day['active_calories']:.0f} calories" if biggest_day else "No data", cls="insight-value"),
+                            cls="insight-card"
+                        ),
+                        Div(
+                            H4("Annual Average"),
+                            P("12-Month Average"),
+                            P(f"{annual_average:.0f} cal/day", cls="insight-value"),
+                            cls="insight-card"
+                        ),
+                        Div(
+                            H4("Longest Streak"),
+                            P(f"Current: {insights['current_streak']} days"),
+                            P(f"{insights['longest_streak']} active days", cls="insight-value"),
+                            cls="insight-card"
+                        ),
+                        Div(
+                            H4("Typical Active Day"),
+                            P(f"Middle half: {percentiles['p25']:.0f}-{percentiles['p75']:.0f} cal, top 10%: {percentiles['p90']:.0f}+"
+                              if percentiles else "No active days"),
+                            P(f"{percentiles['p50']:.0f} cal median" if percentiles else "No data", cls="insight-value"),
+                            cls="insight-card"
+                        ),
+                        cls="insights-grid"
                     ),
-                    cls="insights-grid"
+                    cls="insights-section"
                 ),
-                cls="insights-section"
-            ),
             
-            # Chart data script
-            Script(f"""
-                const chartData = {{
-                    labels: {json.dumps(chart_labels)},
-                    values: {json.dumps(chart_values)},
-                    annualAverage: {annual_average:.1f}
-                }};
+                # Chart data script
+                Script(f"""
+                    const chartData = {{
+                        labels: {chart_labels_json},
+                        values: {chart_values_json},
+                        annualAverage: {annual_average:.1f}
+                    }};
                 
-                // Initialize chart when page loads
-                document.addEventListener('DOMContentLoaded', function() {{
-                    initChart(chartData);
-                }});
-            """),
+                    // Initialize chart when page loads
+                    document.addEventListener('DOMContentLoaded', function() {{
+                        initChart(chartData);
+                        initChartControls(chartData);
+                        initZoneBreakdown();
+                    }});
+                """),
             
-            # Logout section
-            Div(
-                A("Logout", href="/logout", cls="btn-secondary"),
-                cls="logout-section"
+                # Logout section
+                Div(
+                    A("Logout", href="/logout", cls="btn-secondary"),
+                    cls="logout-section"
+                )
             )
-        )
+        return TrainingPeaksLayout("Dashboard", *content)
         
     except Exception as e:
         return TrainingPeaksLayout(
@@ -405,12 +524,97 @@ def get(session):
             A("Back to Login", href="/login", cls="btn-primary")
         )
 
+@rt("/api/chart")
+def get(session, mode: str = "daily", start: str = "", end: str = "", width: int = 800):
+    """Compact, downsampled daily chart series for the requested zoom range"""
+    if not session.get('authenticated'):
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    extractor = get_extractor()
+    if not extractor.authenticated:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    
+    from chart_data import build_chart_payload, build_series_payload
+    try:
+        username = session.get('username', '')
+        inputs = prefetch.get_dashboard_inputs(username, extractor)
+        if mode == "fitness":
+            model = training_load_store.update(username, inputs['daily'], through=_yesterday())
+            points = [(day, ctl) for day, _, ctl in model.history]
+            return JSONResponse(build_series_payload(mode, points, start=start or None,
+                                                     end=end or None, width=width))
+        return JSONResponse(build_chart_payload(inputs['daily'], mode=mode, start=start or None,
+                                                end=end or None, width=width))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({'error': f'Chart data failed: {str(e)}'}, status_code=500)
+
+@rt("/api/zones")
+def get(session, days: int = 30, max_hr: float = 0):
+    """Minutes per heart-rate zone over the last `days` days"""
+    if not session.get('authenticated'):
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    extractor = get_extractor()
+    if not extractor.authenticated:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    if not 1 <= days <= MAX_ZONE_DAYS:
+        return JSONResponse({'error': f'days must be between 1 and {MAX_ZONE_DAYS}'}, status_code=400)
+
+    from intraday import date_range, ingest_heart_rates
+    from scheduler import INTERACTIVE
+    try:
+        username = session.get('username', '')
+        dates = date_range(days)
+        # The dashboard is waiting on this, so it goes ahead of exports and other background work
+        ingest_heart_rates(extractor, intraday_store, username, dates, priority=INTERACTIVE)
+        summary = intraday_store.zone_summary(username, dates, max_hr=max_hr or None)
+        return JSONResponse({'start': dates[0], 'end': dates[-1], **summary})
+    except Exception as e:
+        return JSONResponse({'error': f'Zone data failed: {str(e)}'}, status_code=500)
+
+@rt("/api/export")
+def get(session, kind: str = "daily", format: str = "csv", start: str = "", end: str = ""):
+    """Stream the full daily or activity history as CSV or NDJSON"""
+    if not session.get('authenticated'):
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+    extractor = get_extractor()
+    if not extractor.authenticated:
+        return JSONResponse({'error': 'Not authenticated'}, status_code=401)
+
+    import export
+    try:
+        start_date, end_date = export.parse_range(start or None, end or None)
+        chunks = export.stream_export(extractor, kind, format, start_date, end_date,
+                                      tenant=session.get('username') or None)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    # Fetch the first chunk up front so an upstream failure can still get an
+    # error status; a later failure aborts the stream rather than ending it cleanly
+    try:
+        first_chunk = next(chunks, '')
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        return JSONResponse({'error': f"Export failed: {e}"}, status_code=502)
+
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    filename = f"{kind}-{start_date:%Y%m%d}-{end_date:%Y%m%d}.{format}"
+    return StreamingResponse(
+        itertools.chain([first_chunk], chunks),
+        media_type=export.CONTENT_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
 @rt("/logout")
 def get(session):
     """Logout and clear session"""
+    if session.get('username'):
+        prefetch.discard(session['username'])
     session.clear()
     return RedirectResponse('/login')
 
+_record_timing("module startup", _MODULE_STARTED)
+
 # Export the app for Vercel
 # Vercel will automatically serve this as a serverless function
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Static Asset Pipeline for Do The Work App
+
+The build step copies each static asset to static/dist under a
+content-hashed name (app.3f2a9c1b7d4e.js) next to precompressed .gz (and
+.br, when the brotli package is installed) variants, and records the names
+in static/dist/manifest.json. Chart.js is downloaded once at a pinned
+version into static/vendor, so pages no longer depend on a third-party CDN.
+
+At runtime asset_url() maps a source name to its hashed URL. Hashed files
+never change, so they are served with an immutable Cache-Control header by
+PrecompressedStaticFiles, which also picks the precompressed variant the
+browser accepts. If an asset was edited without rebuilding, its manifest
+entry is ignored and the plain file is served with a ?v= query instead.
+
+Until Chart.js has been vendored, pages load it from the pinned CDN URL,
+and both the build and --check exit non-zero so the gap is not missed.
+
+Usage:
+    python assets.py            # vendor Chart.js (if missing) and build static/dist
+    python assets.py --check    # exit non-zero if Chart.js is not vendored or static/dist is out of date
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+CHART_JS_VERSION = '4.4.4'
+CHART_JS_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHART_JS_VERSION}/dist/chart.umd.min.js"
+CHART_JS = 'vendor/chart.umd.min.js'
+
+# Assets fingerprinted by the build, relative to static/
+SOURCES = ('style.css', 'app.js', CHART_JS)
+
+# Used when an asset is not available locally (Chart.js before the first build)
+FALLBACK_URLS = {CHART_JS: CHART_JS_URL}
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Precompressed variants in order of preference: (content-coding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _hashed_name(source: str, digest: str) -> str:
+    stem, ext = os.path.splitext(os.path.basename(source))
+    return f"{stem}.{digest}{ext}"
+
+
+def _load_manifest() -> Dict[str, Dict[str, str]]:
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=None)
+def _asset_urls() -> Dict[str, str]:
+    """Public URL of every known asset, resolved once per process."""
+    manifest = _load_manifest()
+    urls: Dict[str, str] = {}
+    for source in SOURCES:
+        path = os.path.join(STATIC_DIR, source)
+        if not os.path.exists(path):
+            if source in FALLBACK_URLS:
+                urls[source] = FALLBACK_URLS[source]
+            continue
+        digest = _file_hash(path)
+        entry = manifest.get(source)
+        if entry and entry.get('hash') == digest and os.path.exists(os.path.join(DIST_DIR, entry['file'])):
+            urls[source] = f"/static/dist/{entry['file']}"
+        else:
+            # Edited since the last build: still cache-busted, just not immutable
+            urls[source] = f"/static/{source}?v={digest}"
+    return urls
+
+
+def asset_url(source: str) -> str:
+    """
+    URL for a static asset.
+
+    Args:
+        source: Path relative to static/, e.g. 'app.js'
+
+    Returns:
+        The fingerprinted /static/dist URL when built, otherwise a fallback
+    """
+    return _asset_urls().get(source) or FALLBACK_URLS.get(source) or f"/static/{source}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves .br/.gz siblings when the client accepts them and
+    marks fingerprinted files under dist/ as immutable.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        if scope['method'] in ('GET', 'HEAD'):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            immutable = path.replace(os.sep, '/').startswith('dist/')
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        request_headers = Headers(scope=scope)
+        accepted = {coding.split(';')[0].strip() for coding in request_headers.get('accept-encoding', '').split(',')}
+        if not accepted & {coding for coding, _ in ENCODINGS}:
+            return None
+        original, _ = await anyio.to_thread.run_sync(self._lookup, path)
+        if original is None:
+            return None
+
+        for coding, suffix in ENCODINGS:
+            if coding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self._lookup, path + suffix)
+            if full_path is None:
+                continue
+            media_type = mimetypes.guess_type(original)[0] or 'application/octet-stream'
+            response = FileResponse(full_path, stat_result=stat_result, media_type=media_type)
+            response.headers['Content-Encoding'] = coding
+            response.headers['Vary'] = 'Accept-Encoding'
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+    def _lookup(self, path: str) -> Tuple[Optional[str], Optional[os.stat_result]]:
+        try:
+            full_path, stat_result = self.lookup_path(path)
+        except (OSError, ValueError):
+            return None, None
+        if stat_result is None or not os.path.isfile(full_path):
+            return None, None
+        return full_path, stat_result
+
+
+def _download_chart_js(url: str) -> bytes:
+    import urllib.request
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+
+def _npm_pack_chart_js() -> bytes:
+    """The UMD build from the npm tarball (npm verifies the registry's integrity hash)."""
+    import subprocess
+    import tarfile
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(['npm', 'pack', f"chart.js@{CHART_JS_VERSION}", '--silent'],
+                       cwd=tmp, check=True, capture_output=True, timeout=120)
+        with tarfile.open(os.path.join(tmp, f"chart.js-{CHART_JS_VERSION}.tgz")) as tarball:
+            return tarball.extractfile('package/dist/chart.umd.js').read()
+
+
+# Tried in order until one yields the pinned build
+CHART_JS_SOURCES = (
+    (f"jsDelivr chart.js@{CHART_JS_VERSION}", lambda: _download_chart_js(CHART_JS_URL)),
+    (f"unpkg chart.js@{CHART_JS_VERSION}",
+     lambda: _download_chart_js(f"https://unpkg.com/chart.js@{CHART_JS_VERSION}/dist/chart.umd.js")),
+    (f"npm pack chart.js@{CHART_JS_VERSION}", _npm_pack_chart_js),
+)
+
+
+def vendor_chart_js(refresh: bool = False) -> bool:
+    """
+    Download the pinned Chart.js build into static/vendor.
+
+    Each source in CHART_JS_SOURCES is tried in turn; a download is only
+    accepted if its license banner names the pinned version.
+
+    Returns:
+        True if the file is present afterwards
+    """
+    path = os.path.join(STATIC_DIR, CHART_JS)
+    if os.path.exists(path) and not refresh:
+        return True
+
+    banner = f"Chart.js v{CHART_JS_VERSION}".encode()
+    print(f"⬇️  Downloading Chart.js {CHART_JS_VERSION}")
+    for label, fetch in CHART_JS_SOURCES:
+        try:
+            body = fetch()
+        except Exception as e:
+            print(f"⚠️  {label}: {e}")
+            continue
+        if banner not in body[:500]:
+            print(f"⚠️  {label}: not the Chart.js {CHART_JS_VERSION} build, ignored")
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        print(f"  📥 Vendored Chart.js from {label}")
+        return True
+
+    print("⚠️  Could not download Chart.js; pages will load it from the CDN")
+    return False
+
+
+def build_manifest() -> Dict[str, Dict[str, str]]:
+    """Manifest entries for the current sources (without writing anything)."""
+    manifest = {}
+    for source in SOURCES:
+        path = os.path.join(STATIC_DIR, source)
+        if os.path.exists(path):
+            digest = _file_hash(path)
+            manifest[source] = {'file': _hashed_name(source, digest), 'hash': digest}
+    return manifest
+
+
+def build() -> Dict[str, Dict[str, str]]:
+    """Write fingerprinted and precompressed assets plus the manifest to static/dist."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = build_manifest()
+
+    keep = {'manifest.json'}
+    for source, entry in manifest.items():
+        with open(os.path.join(STATIC_DIR, source), 'rb') as f:
+            body = f.read()
+        target = os.path.join(DIST_DIR, entry['file'])
+        with open(target, 'wb') as f:
+            f.write(body)
+        # mtime=0 keeps the .gz output identical between builds
+        with open(f"{target}.gz", 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=9, mtime=0))
+        keep.update({entry['file'], f"{entry['file']}.gz"})
+        if brotli is not None:
+            with open(f"{target}.br", 'wb') as f:
+                f.write(brotli.compress(body, quality=11))
+            keep.add(f"{entry['file']}.br")
+        print(f"  📦 {source} -> dist/{entry['file']} ({len(body):,} bytes)")
+
+    # Drop outputs of earlier builds
+    for name in os.listdir(DIST_DIR):
+        if name not in keep:
+            os.remove(os.path.join(DIST_DIR, name))
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def main():
+    """Command line entry point for the asset build."""
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets.")
+    parser.add_argument('--check', action='store_true', help="Only verify that static/dist is up to date")
+    parser.add_argument('--refresh-vendor', action='store_true', help="Download Chart.js again")
+    args = parser.parse_args()
+
+    vendored = os.path.exists(os.path.join(STATIC_DIR, CHART_JS))
+    if args.check:
+        ok = True
+        if not vendored:
+            print(f"❌ static/{CHART_JS} is missing, so pages load Chart.js from the CDN. Run: python assets.py")
+            ok = False
+        if build_manifest() != _load_manifest():
+            print("❌ static/dist is out of date. Run: python assets.py")
+            ok = False
+        if not ok:
+            sys.exit(1)
+        print("✅ static/dist is up to date")
+        return
+
+    vendored = vendor_chart_js(refresh=args.refresh_vendor)
+    build()
+    if brotli is None:
+        print("ℹ️  brotli not installed; only gzip variants were written")
+    print(f"✅ Assets written to '{DIST_DIR}'")
+    if not vendored:
+        print("❌ Chart.js is not vendored; run again with network access and commit static/vendor")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
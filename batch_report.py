@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Batch Report Generator for Do The Work App
+
+Runs the dashboard pipeline for a roster of athletes: daily stats are fetched
+from Garmin Connect in parallel (each account limited by its own request
+budget) and the dashboard metrics are computed in a process pool. Every
+athlete gets a JSON report in the same shape as sample_data.json, with an
+extra activity_breakdown of calories per activity type, plus a summary.csv
+for the whole roster. Fetched daily series and per-day activity totals are
+kept as binary snapshots (see snapshot.py) under raw/.
+
+Progress is checkpointed after each fetch and each report, so an interrupted
+run picks up where it left off when started again with the same output dir.
+
+Roster file (CSV with a header row):
+    athlete_id,email,password_env
+    jane,jane@example.com,GARMIN_PASSWORD_JANE
+
+Passwords are read from the environment variable named in password_env so
+that credentials never have to be written to disk.
+
+Usage:
+    python batch_report.py roster.csv --output reports/
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import scheduler
+from garmin_data import GarminDataExtractor
+from snapshot import Snapshot, write_snapshot
+
+
+SUMMARY_FIELDS = [
+    'athlete_id',
+    'status',
+    'avg_30_day_calories',
+    'monthly_ramp_rate',
+    'total_days',
+    'active_days',
+    'activity_count',
+    'last_updated',
+    'error',
+]
+
+
+class RateBudget:
+    """Token bucket limiting the request rate of a single Garmin account."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Sustained requests per second allowed for the account
+            burst: Maximum number of requests allowed back-to-back (default: rate)
+        """
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request token is available, then spend it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint:
+    """Per-athlete progress record persisted as JSON after every change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def status(self, athlete_id: str) -> Optional[str]:
+        return self.entries.get(athlete_id, {}).get('status')
+
+    def mark(self, athlete_id: str, status: str, **extra: Any) -> None:
+        """Record an athlete's new status and write the checkpoint atomically."""
+        with self._lock:
+            self.entries[athlete_id] = {'status': status, 'updated': datetime.now().isoformat(), **extra}
+            _write_json_atomic(self.path, self.entries, indent=2)
+
+
+def _write_json_atomic(path: str, payload: Any, indent: Optional[int] = None) -> None:
+    """Write JSON via a temporary file so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=indent)
+    os.replace(tmp_path, path)
+
+
+# Athlete ids name files in the output dir, so they must be plain file names
+ATHLETE_ID_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,63}')
+RESERVED_ATHLETE_IDS = {'checkpoint', 'summary', 'raw'}
+
+
+def load_roster(path: str) -> List[Dict[str, str]]:
+    """
+    Read the roster CSV.
+
+    Returns:
+        List of dictionaries with athlete_id, email and password_env keys
+
+    Raises:
+        ValueError: If an athlete_id is not a safe file name (see ATHLETE_ID_PATTERN)
+            or collides with the checkpoint, summary or raw data
+    """
+    roster = []
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            athlete_id = (row.get('athlete_id') or '').strip()
+            email = (row.get('email') or '').strip()
+            if not athlete_id or not email:
+                continue
+            if not ATHLETE_ID_PATTERN.fullmatch(athlete_id) or athlete_id.lower() in RESERVED_ATHLETE_IDS:
+                raise ValueError(f"Invalid athlete_id '{athlete_id}' on line {reader.line_num}: use letters, "
+                                 f"digits, '_', '-' and '.' (not leading), and not {sorted(RESERVED_ATHLETE_IDS)}")
+            roster.append({
+                'athlete_id': athlete_id,
+                'email': email,
+                'password_env': (row.get('password_env') or '').strip(),
+            })
+    return roster
+
+
+def _activity_breakdown(aggregates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Roll per-day activity totals up by activity type.
+
+    Returns:
+        List of { type: str, calories: float, count: int }, highest calories first
+    """
+    totals: Dict[str, List[float]] = {}
+    for aggregate in aggregates:
+        entry = totals.setdefault(aggregate['type'], [0.0, 0])
+        entry[0] += aggregate['calories']
+        entry[1] += aggregate['count']
+    return [
+        {'type': act_type, 'calories': round(calories, 1), 'count': int(count)}
+        for act_type, (calories, count) in sorted(totals.items(), key=lambda kv: -kv[1][0])
+    ]
+
+
+def _compute_report(raw_data: List[Dict], activity_aggregates: List[Dict[str, Any]]) -> Dict:
+    """Process-pool entry point: turn an athlete's daily series and activities into a report."""
+    report = GarminDataExtractor().build_dashboard_data(raw_data)
+    report['activity_breakdown'] = _activity_breakdown(activity_aggregates)
+    return report
+
+
+class BatchReportRunner:
+    """Fetches and reports dashboard data for every athlete on a roster."""
+
+    def __init__(
+        self,
+        roster: List[Dict[str, str]],
+        output_dir: str,
+        days: int = 365,
+        athlete_workers: int = 16,
+        day_workers: int = 8,
+        rate: float = 10.0,
+        processes: Optional[int] = None,
+    ):
+        """
+        Args:
+            roster: Athletes as returned by load_roster
+            output_dir: Directory for reports, raw data and the checkpoint
+            days: Number of days of history to fetch per athlete
+            athlete_workers: Number of athletes fetched at the same time
+            day_workers: Concurrent get_stats requests per athlete
+            rate: Requests per second allowed for each account
+            processes: Size of the metrics process pool (default: CPU count)
+        """
+        self.roster = roster
+        self.output_dir = output_dir
+        self.raw_dir = os.path.join(output_dir, 'raw')
+        self.athlete_workers = athlete_workers
+        self.day_workers = day_workers
+        self.rate = rate
+        self.processes = processes
+
+        # One window for the whole run so every report covers the same dates
+        self.end_date = datetime.now()
+        self.start_date = self.end_date - timedelta(days=days)
+
+        # Every athlete fetching at full per-account concurrency fits under the process-wide cap
+        scheduler.configure(athlete_workers * day_workers)
+
+        os.makedirs(self.raw_dir, exist_ok=True)
+        self.checkpoint = Checkpoint(os.path.join(output_dir, 'checkpoint.json'))
+
+    def _report_path(self, athlete_id: str) -> str:
+        return os.path.join(self.output_dir, f"{athlete_id}.json")
+
+    def _raw_path(self, athlete_id: str) -> str:
+        return os.path.join(self.raw_dir, f"{athlete_id}.dtws")
+
+    def _fetch_athlete(self, athlete: Dict[str, str]) -> Tuple[List[Dict], List[Dict[str, Any]]]:
+        """
+        Authenticate one athlete and fetch their daily series and activities (runs in a thread).
+
+        Returns:
+            (daily stats, per-day activity aggregates)
+        """
+        password = os.environ.get(athlete['password_env'], '') if athlete['password_env'] else ''
+        if not password:
+            raise Exception(f"Password environment variable '{athlete['password_env']}' is not set")
+
+        extractor = GarminDataExtractor()
+        if not extractor.authenticate(athlete['email'], password):
+            raise Exception('Authentication failed')
+        # Spent before each call but outside its timing, so token waits neither
+        # trigger hedges nor count toward the per-call timeout
+        extractor.rate_budget = RateBudget(self.rate)
+        # A year of history at the account's request rate takes far longer than
+        # the dashboard's fetch deadline; only the per-call timeout applies here
+        extractor.fetch_timeout = None
+
+        raw_data = extractor.get_daily_active_calories(
+            self.start_date, self.end_date, max_workers=self.day_workers,
+            tenant=athlete['athlete_id'], priority=scheduler.BACKGROUND
+        )
+        if not raw_data:
+            raise Exception('No data found')
+        # A report with missing days would count them as zero calories; retry the athlete instead
+        failed_days = sum(1 for day in raw_data if 'error' in day)
+        if failed_days:
+            raise Exception(f"{failed_days} of {len(raw_data)} days could not be fetched")
+
+        activities = extractor._get_activities_in_range(
+            self.start_date, self.end_date, use_cache=False, strict=True,
+            tenant=athlete['athlete_id'], priority=scheduler.BACKGROUND
+        )
+        activity_aggregates = extractor.get_activity_aggregates(activities)
+
+        write_snapshot(self._raw_path(athlete['athlete_id']), raw_data, activity_aggregates, metadata={
+            'athlete_id': athlete['athlete_id'],
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+        })
+        return raw_data, activity_aggregates
+
+    def run(self) -> Dict[str, int]:
+        """
+        Process the roster, skipping athletes already completed by a previous run.
+
+        Returns:
+            Counts of athletes per outcome: done, failed and skipped
+        """
+        counts = {'done': 0, 'failed': 0, 'skipped': 0}
+        pending_fetch: List[Dict[str, str]] = []
+        pending_compute: List[str] = []
+
+        for athlete in self.roster:
+            athlete_id = athlete['athlete_id']
+            status = self.checkpoint.status(athlete_id)
+            if status == 'done' and os.path.exists(self._report_path(athlete_id)):
+                counts['skipped'] += 1
+            elif status == 'fetched' and os.path.exists(self._raw_path(athlete_id)):
+                pending_compute.append(athlete_id)
+            else:
+                pending_fetch.append(athlete)
+
+        print(f"📋 Roster: {len(self.roster)} athletes "
+              f"({counts['skipped']} done, {len(pending_compute)} fetched, {len(pending_fetch)} to fetch)")
+
+        # Spawned rather than forked, as this process is already running fetch and scheduler threads
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.processes,
+                                                    mp_context=multiprocessing.get_context('spawn')) as pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.athlete_workers) as fetchers:
+            compute_futures: Dict[concurrent.futures.Future, str] = {}
+
+            # Athletes whose raw data survived a previous run go straight to the pool
+            for athlete_id in pending_compute:
+                with Snapshot(self._raw_path(athlete_id)) as snap:
+                    compute_futures[pool.submit(_compute_report, snap.to_daily_stats(),
+                                                snap.activity_aggregates())] = athlete_id
+
+            fetch_futures = {fetchers.submit(self._fetch_athlete, athlete): athlete['athlete_id']
+                             for athlete in pending_fetch}
+
+            for future in concurrent.futures.as_completed(fetch_futures):
+                athlete_id = fetch_futures[future]
+                try:
+                    raw_data, activity_aggregates = future.result()
+                except Exception as e:
+                    print(f"❌ {athlete_id}: {e}")
+                    self.checkpoint.mark(athlete_id, 'failed', error=str(e))
+                    counts['failed'] += 1
+                    continue
+                self.checkpoint.mark(athlete_id, 'fetched')
+                compute_futures[pool.submit(_compute_report, raw_data, activity_aggregates)] = athlete_id
+
+            for future in concurrent.futures.as_completed(compute_futures):
+                athlete_id = compute_futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:
+                    print(f"❌ {athlete_id}: metrics failed: {e}")
+                    self.checkpoint.mark(athlete_id, 'failed', error=str(e))
+                    counts['failed'] += 1
+                    continue
+                _write_json_atomic(self._report_path(athlete_id), report, indent=2)
+                self.checkpoint.mark(athlete_id, 'done')
+                counts['done'] += 1
+                print(f"✅ {athlete_id}: report written")
+
+        self.write_summary()
+        return counts
+
+    def write_summary(self) -> str:
+        """Write summary.csv with one row of headline metrics per roster athlete."""
+        summary_path = os.path.join(self.output_dir, 'summary.csv')
+        with open(summary_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            for athlete in self.roster:
+                athlete_id = athlete['athlete_id']
+                entry = self.checkpoint.entries.get(athlete_id, {})
+                row = {'athlete_id': athlete_id, 'status': entry.get('status', 'pending'),
+                       'error': entry.get('error', '')}
+                report_path = self._report_path(athlete_id)
+                if row['status'] == 'done' and os.path.exists(report_path):
+                    with open(report_path) as report_file:
+                        report = json.load(report_file)
+                    row.update(report.get('metrics', {}))
+                    row['activity_count'] = sum(entry['count'] for entry in report.get('activity_breakdown', []))
+                    row['last_updated'] = report.get('last_updated', '')
+                writer.writerow(row)
+        return summary_path
+
+
+def main():
+    """Command line entry point for nightly batch runs."""
+    parser = argparse.ArgumentParser(description="Generate dashboard reports for a roster of athletes.")
+    parser.add_argument('roster', help="Roster CSV with athlete_id,email,password_env columns")
+    parser.add_argument('--output', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('--days', type=int, default=365, help="Days of history per athlete (default: 365)")
+    parser.add_argument('--athlete-workers', type=int, default=16, help="Athletes fetched in parallel (default: 16)")
+    parser.add_argument('--day-workers', type=int, default=8, help="Concurrent requests per athlete (default: 8)")
+    parser.add_argument('--rate', type=float, default=10.0, help="Requests per second per account (default: 10)")
+    parser.add_argument('--processes', type=int, default=None, help="Metrics worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    print("🏃‍♂️ Do The Work - Batch Report Generator")
+    print("=" * 40)
+
+    try:
+        roster = load_roster(args.roster)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not roster:
+        print("❌ Roster is empty.")
+        return
+
+    started = time.monotonic()
+    runner = BatchReportRunner(
+        roster,
+        args.output,
+        days=args.days,
+        athlete_workers=args.athlete_workers,
+        day_workers=args.day_workers,
+        rate=args.rate,
+        processes=args.processes,
+    )
+    counts = runner.run()
+
+    print(f"\n✅ Batch complete in {time.monotonic() - started:.1f}s: "
+          f"{counts['done']} done, {counts['failed']} failed, {counts['skipped']} skipped")
+    print(f"📄 Summary written to '{os.path.join(args.output, 'summary.csv')}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Render Micro-Benchmark for Do The Work App
+
+Compares building the whole page as an FT tree on every request against
+rendering only the dynamic content into the cached layout fragments.
+
+Usage (from the repository root):
+    python bench_render.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+
+from fasthtml.common import Div, to_xml  # noqa: E402
+import index  # noqa: E402
+
+
+def dashboard_content():
+    """Representative dashboard body: stat cards and insight cards."""
+    return (
+        Div(
+            index.StatCard("30-Day Average", "1002", "Active Calories/Day"),
+            index.StatCard("Monthly Trend", "+4.5%", "vs Previous 30 Days", trend="up"),
+            index.StatCard("Performance Level", "Developmental", "3-Month Average"),
+            cls="metrics-grid"
+        ),
+        Div(
+            *[index.StatCard(f"Insight {i}", f"{i * 100}", "cal/day") for i in range(4)],
+            cls="insights-grid"
+        ),
+    )
+
+
+def bench(label: str, fn, number: int) -> None:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<40} {seconds * 1e6:8.1f} µs/render")
+
+
+def main():
+    number = 2000
+
+    print("🏃‍♂️ Do The Work - Render Benchmark")
+    print("=" * 40)
+    bench("login (full FT tree)", lambda: to_xml(index._layout_tree("Login", index.LoginCard())), number)
+    bench("login (cached page)", lambda: index._login_page(), number)
+    bench("login error (cached layout)",
+          lambda: index.render_page("Login", index.LoginCard(error="Authentication failed", username="a@b.c")),
+          number)
+    bench("dashboard (full FT tree)", lambda: to_xml(index._layout_tree("Dashboard", *dashboard_content())), number)
+    bench("dashboard (cached layout)", lambda: index.render_page("Dashboard", *dashboard_content()), number)
+
+
+if __name__ == "__main__":
+    main()
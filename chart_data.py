@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Compact Chart Payloads for Do The Work App
+
+Builds the daily, rolling-average and fitness chart series served by /api/chart.
+Series are downsampled with Largest-Triangle-Three-Buckets (LTTB) to about
+one point per pixel of the chart canvas, then sent as delta-encoded int32
+arrays in base64, so a multi-year daily chart stays at a few KB.
+
+Payload shape:
+    {
+        'mode': 'daily' | 'rolling' | 'fitness',
+        'start': 'YYYY-MM-DD',       # date of day offset 0
+        'x': '<base64>',             # delta-encoded day offsets from start
+        'y': '<base64>',             # delta-encoded calories (rounded)
+        'count': int,                # points in the payload
+        'source_points': int,        # points before downsampling
+        'average': float             # mean of the plotted window
+    }
+"""
+
+import base64
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CHART_MODES = ('daily', 'rolling')
+
+# Trailing window (days) for the rolling-average mode
+ROLLING_WINDOW = 7
+
+# Bounds on the number of points requested by the client
+MIN_POINTS = 10
+MAX_POINTS = 4000
+
+
+def rolling_average(values: Sequence[float], window: int = ROLLING_WINDOW) -> List[float]:
+    """Trailing mean over the last `window` values (fewer at the start)."""
+    averages: List[float] = []
+    total = 0.0
+    for i, value in enumerate(values):
+        total += value
+        if i >= window:
+            total -= values[i - window]
+        averages.append(total / min(i + 1, window))
+    return averages
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> Tuple[List[float], List[float]]:
+    """
+    Downsample a series with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. This preserves peaks and troughs far
+    better than averaging or striding.
+
+    Args:
+        xs: X values in ascending order
+        ys: Y values, same length as xs
+        threshold: Number of points to keep
+
+    Returns:
+        (xs, ys) of the downsampled series
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    every = (n - 2) / (threshold - 2)
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_len = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_len
+        avg_y = sum(ys[avg_start:avg_end]) / avg_len
+
+        # Pick the point of the current bucket with the largest triangle
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        out_x.append(xs[next_a])
+        out_y.append(ys[next_a])
+        a = next_a
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+def encode_deltas(values: Sequence[int]) -> str:
+    """Delta-encode integers and pack them as base64 little-endian int32."""
+    deltas = array('i')
+    previous = 0
+    for value in values:
+        deltas.append(value - previous)
+        previous = value
+    if array('i', [1]).tobytes()[0] != 1:
+        deltas.byteswap()
+    return base64.b64encode(deltas.tobytes()).decode('ascii')
+
+
+def decode_deltas(encoded: str) -> List[int]:
+    """Inverse of encode_deltas."""
+    deltas = array('i')
+    deltas.frombytes(base64.b64decode(encoded))
+    if array('i', [1]).tobytes()[0] != 1:
+        deltas.byteswap()
+    values: List[int] = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def build_chart_payload(
+    daily: List[Dict[str, Any]],
+    mode: str = 'daily',
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    width: int = 800,
+) -> Dict[str, Any]:
+    """
+    Build a compact chart payload from daily stats.
+
+    Args:
+        daily: Daily stats as returned by get_daily_active_calories
+        mode: 'daily' for raw values, 'rolling' for the 7-day trailing mean
+        start: First date to include (YYYY-MM-DD), default: first available
+        end: Last date to include (YYYY-MM-DD), default: last available
+        width: Chart width in pixels; the series is downsampled to about this many points
+
+    Returns:
+        Payload dictionary (see module docstring)
+    """
+    if mode not in CHART_MODES:
+        raise ValueError(f"Unknown chart mode '{mode}'")
+
+    # Days that failed to load are left out rather than plotted as zero
+    days = sorted((d for d in daily if 'error' not in d and d.get('date')), key=lambda d: d['date'])
+    values = [float(d.get('active_calories') or 0) for d in days]
+    if mode == 'rolling':
+        # Rolling means are computed before the zoom so the window edge is accurate
+        values = rolling_average(values)
+
+    return build_series_payload(mode, [(d['date'], v) for d, v in zip(days, values)], start, end, width)
+
+
+def build_series_payload(
+    mode: str,
+    points: List[Tuple[str, float]],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    width: int = 800,
+) -> Dict[str, Any]:
+    """
+    Build a compact chart payload from any dated series.
+
+    Args:
+        mode: Label stored in the payload
+        points: (YYYY-MM-DD, value) pairs in ascending date order
+        start: First date to include, default: first available
+        end: Last date to include, default: last available
+        width: Chart width in pixels; the series is downsampled to about this many points
+
+    Returns:
+        Payload dictionary (see module docstring)
+    """
+    selected = [
+        (date_str, v) for date_str, v in points
+        if (not start or date_str >= start) and (not end or date_str <= end)
+    ]
+    if not selected:
+        return {'mode': mode, 'start': start or '', 'x': '', 'y': '', 'count': 0,
+                'source_points': 0, 'average': 0.0}
+
+    origin = datetime.strptime(selected[0][0], '%Y-%m-%d').toordinal()
+    xs = [datetime.strptime(date_str, '%Y-%m-%d').toordinal() - origin for date_str, _ in selected]
+    ys = [v for _, v in selected]
+
+    threshold = max(MIN_POINTS, min(MAX_POINTS, int(width)))
+    sample_x, sample_y = lttb(xs, ys, threshold)
+
+    return {
+        'mode': mode,
+        'start': selected[0][0],
+        'x': encode_deltas([int(x) for x in sample_x]),
+        'y': encode_deltas([int(round(y)) for y in sample_y]),
+        'count': len(sample_x),
+        'source_points': len(xs),
+        'average': round(sum(ys) / len(ys), 1),
+    }
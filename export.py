@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Streaming Data Export for Do The Work App
+
+Streams a user's full daily stats and activity history as CSV or NDJSON.
+Rows are produced by generators that fetch the date range in fixed-size
+windows, so memory use stays constant no matter how many years are
+exported. The web app serves the same generators from /api/export with
+chunked transfer encoding.
+
+Usage:
+    python export.py daily --start 2020-01-01 --format csv > daily.csv
+    python export.py activities --start 2020-01-01 --format ndjson > activities.ndjson
+    python export.py daily --replay garmin_recording.jsonl.gz
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from scheduler import BACKGROUND
+
+EXPORT_KINDS = ('daily', 'activities')
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+DAILY_FIELDS = ['date', 'active_calories', 'total_calories', 'bmr_calories', 'cached']
+ACTIVITY_FIELDS = ['date', 'start_time', 'activity_id', 'type', 'name', 'calories',
+                   'duration_seconds', 'distance_meters']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Days fetched per window; only one window of rows is held in memory at a time
+DAILY_WINDOW_DAYS = 31
+ACTIVITY_WINDOW_DAYS = 90
+
+# Longest range a single export may cover
+MAX_EXPORT_DAYS = 10 * 366
+
+# Rows joined into each chunk written to the response
+ROWS_PER_CHUNK = 500
+
+
+def _windows(start_date: datetime, end_date: datetime, days: int) -> Iterator[tuple]:
+    """Consecutive (start, end) datetime pairs covering the range, inclusive."""
+    current = start_date
+    while current.date() <= end_date.date():
+        window_end = min(current + timedelta(days=days - 1), end_date)
+        yield current, window_end
+        current = window_end + timedelta(days=1)
+
+
+def iter_daily_stats(extractor: Any, start_date: datetime, end_date: datetime,
+                     max_workers: int = 8, tenant: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield daily stats (as returned by _get_single_day_stats) in date order.
+
+    Requests are scheduled as background work, behind interactive page loads,
+    and fetched days are not added to the extractor's cache, so memory use
+    does not grow with the range. Days served from the cache are exported
+    as they are, but a window with days that could not be fetched at all
+    ends the export with an exception rather than writing zero rows for them.
+
+    Args:
+        extractor: Authenticated GarminDataExtractor
+        start_date: First day to export
+        end_date: Last day to export
+        max_workers: Concurrent get_stats requests per window
+        tenant: User the upstream calls are scheduled for
+
+    Raises:
+        Exception: If any day could not be fetched
+    """
+    for window_start, window_end in _windows(start_date, end_date, DAILY_WINDOW_DAYS):
+        date_list = []
+        current = window_start
+        while current.date() <= window_end.date():
+            date_list.append(current.strftime('%Y-%m-%d'))
+            current += timedelta(days=1)
+        days = extractor._fetch_days_concurrently(date_list, max_workers, tenant=tenant, priority=BACKGROUND,
+                                                  use_cache=False)
+        failed = [day['date'] for day in days if 'error' in day]
+        if failed:
+            raise Exception(f"{len(failed)} days from {failed[0]} could not be fetched")
+        yield from days
+
+
+def iter_activities(extractor: Any, start_date: datetime, end_date: datetime,
+                    tenant: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield normalized activities (see ACTIVITY_FIELDS) in start-time order.
+
+    Requests are scheduled as background work, behind interactive page loads.
+
+    Args:
+        extractor: Authenticated GarminDataExtractor
+        start_date: First day to export
+        end_date: Last day to export
+        tenant: User the upstream calls are scheduled for
+
+    Raises:
+        Exception: If a window of activities could not be fetched
+    """
+    for window_start, window_end in _windows(start_date, end_date, ACTIVITY_WINDOW_DAYS):
+        rows = []
+        activities = extractor._get_activities_in_range(window_start, window_end, use_cache=False, strict=True,
+                                                        tenant=tenant, priority=BACKGROUND)
+        for activity in activities:
+            act_type, calories, date_str = extractor._extract_activity_fields(activity)
+            rows.append({
+                'date': date_str,
+                'start_time': activity.get('startTimeLocal') or activity.get('startTimeGMT') or '',
+                'activity_id': activity.get('activityId'),
+                'type': str(act_type),
+                'name': activity.get('activityName') or '',
+                'calories': calories,
+                'duration_seconds': activity.get('duration'),
+                'distance_meters': activity.get('distance'),
+            })
+        rows.sort(key=lambda r: (r['date'], str(r['start_time'])))
+        yield from rows
+
+
+def to_csv(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    """Serialize rows as CSV lines, header first."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+
+    writer.writeheader()
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def to_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Serialize rows as newline-delimited JSON."""
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+def _chunked(lines: Iterable[str], size: int = ROWS_PER_CHUNK) -> Iterator[str]:
+    """Join lines into larger chunks so each write carries many rows."""
+    chunk: List[str] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def parse_range(start: Optional[str], end: Optional[str], default_days: int = 365) -> tuple:
+    """
+    Parse an export date range.
+
+    Args:
+        start: First day (YYYY-MM-DD), default: default_days before end
+        end: Last day (YYYY-MM-DD), default: today
+
+    Returns:
+        (start_date, end_date) as datetimes
+
+    Raises:
+        ValueError: On malformed dates, an inverted range, or one over MAX_EXPORT_DAYS
+    """
+    end_date = datetime.strptime(end, '%Y-%m-%d') if end else datetime.now()
+    start_date = datetime.strptime(start, '%Y-%m-%d') if start else end_date - timedelta(days=default_days)
+    if start_date.date() > end_date.date():
+        raise ValueError("start must not be after end")
+    if (end_date - start_date).days >= MAX_EXPORT_DAYS:
+        raise ValueError(f"Exports are limited to {MAX_EXPORT_DAYS} days")
+    return start_date, end_date
+
+
+def stream_export(extractor: Any, kind: str, fmt: str, start_date: datetime,
+                  end_date: datetime, tenant: Optional[str] = None) -> Iterator[str]:
+    """
+    Chunks of an export in the requested format.
+
+    Raises:
+        ValueError: On an unknown kind or format
+    """
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind '{kind}'")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+
+    if kind == 'daily':
+        rows, fields = iter_daily_stats(extractor, start_date, end_date, tenant=tenant), DAILY_FIELDS
+    else:
+        rows, fields = iter_activities(extractor, start_date, end_date, tenant=tenant), ACTIVITY_FIELDS
+
+    lines = to_csv(rows, fields) if fmt == 'csv' else to_ndjson(rows)
+    return _chunked(lines)
+
+
+def main():
+    """Command line entry point for exports."""
+    parser = argparse.ArgumentParser(description="Stream daily stats or activities as CSV or NDJSON.")
+    parser.add_argument('kind', choices=EXPORT_KINDS, help="What to export")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', help="Output format (default: csv)")
+    parser.add_argument('--start', help="First day, YYYY-MM-DD (default: one year ago)")
+    parser.add_argument('--end', help="Last day, YYYY-MM-DD (default: today)")
+    parser.add_argument('--output', help="Output file (default: stdout)")
+    parser.add_argument('--replay', help="Export from a recording made with garmin_replay.py")
+    args = parser.parse_args()
+
+    try:
+        start_date, end_date = parse_range(args.start, args.end)
+    except ValueError as e:
+        parser.error(str(e))
+
+    from garmin_data import GarminDataExtractor
+    extractor = GarminDataExtractor()
+    if args.replay:
+        from garmin_replay import enable_replay
+        with contextlib.redirect_stdout(sys.stderr):
+            enable_replay(extractor, args.replay)
+    else:
+        # Prompts go to stderr so stdout carries only the export
+        sys.stderr.write("Enter your Garmin Connect email: ")
+        email = input().strip()
+        sys.stderr.write("Enter your Garmin Connect password: ")
+        password = input().strip()
+        with contextlib.redirect_stdout(sys.stderr):
+            if not extractor.authenticate(email, password):
+                sys.exit(1)
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        chunks = stream_export(extractor, args.kind, args.format, start_date, end_date)
+        while True:
+            # Extractor progress output goes to stderr while rows are fetched
+            with contextlib.redirect_stdout(sys.stderr):
+                try:
+                    chunk = next(chunks, None)
+                except Exception as e:
+                    print(f"❌ Export failed: {e}")
+                    sys.exit(1)
+            if chunk is None:
+                break
+            out.write(chunk)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.output:
+        print(f"✅ Export written to '{args.output}'", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
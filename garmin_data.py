@@ -8,13 +8,17 @@ data from Garmin Connect using the garminconnect library.
 
 import sys
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from typing import Any
 from collections import defaultdict
 import statistics
 import json
 import concurrent.futures
 import threading
+import time
+
+from resilience import CircuitBreaker, LatencyTracker
+from scheduler import INTERACTIVE, get_scheduler
 
 try:
     from garminconnect import (
@@ -34,12 +38,43 @@ except ImportError:
     sys.exit(1)
 
 
+# Seconds a single get_stats call may take before its day falls back to cached data
+CALL_TIMEOUT = 10.0
+
+# Seconds a whole concurrent fetch may take (Vercel functions are capped at 60s)
+FETCH_TIMEOUT = 45.0
+
+# Hedged duplicates are never sent before a call has run this long (seconds)
+MIN_HEDGE_DELAY = 0.2
+
+# At most this fraction of calls in one fetch get a hedged duplicate
+MAX_HEDGE_FRACTION = 0.1
+
+
 class GarminDataExtractor:
     """Handles Garmin Connect authentication and data extraction."""
     
     def __init__(self):
         self.client = None
         self.authenticated = False
+        self.call_timeout = CALL_TIMEOUT
+        self.fetch_timeout = FETCH_TIMEOUT
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker()
+        # Intraday heart rate is an optional extra; its failures must not
+        # open the breaker that guards the daily stats and activities
+        self.intraday_breaker = CircuitBreaker()
+        # Optional request budget (an object with acquire(), e.g. batch_report.RateBudget)
+        # spent before every Garmin call; time spent waiting for it is not call latency
+        self.rate_budget = None
+        # Calls are queued fairly per tenant on the process-wide scheduler
+        self.tenant = f"extractor-{id(self):x}"
+        self.clear_cache()
+    
+    def clear_cache(self):
+        """Drop the last-known-good data served when Garmin is slow or failing."""
+        self._stats_cache: Dict[str, Dict] = {}
+        self._activities_cache: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
     
     def authenticate(self, email: str, password: str) -> bool:
         """
@@ -53,9 +88,12 @@ class GarminDataExtractor:
             bool: True if authentication successful, False otherwise
         """
         try:
+            # Cached fallback data belongs to the previous account
+            self.clear_cache()
             self.client = Garmin(email, password)
             self.client.login()
             self.authenticated = True
+            self.tenant = email
             print("✅ Successfully authenticated with Garmin Connect")
             return True
             
@@ -69,55 +107,201 @@ class GarminDataExtractor:
             print(f"❌ Unexpected error during authentication: {e}")
             return False
     
-    def _get_single_day_stats(self, date_str: str) -> Dict:
+    def _acquire_budget(self) -> None:
+        """Wait for the rate budget, if one is set, before a Garmin call."""
+        if self.rate_budget is not None:
+            self.rate_budget.acquire()
+
+    def _get_single_day_stats(self, date_str: str, on_start: Optional[Callable[[], None]] = None,
+                              use_cache: bool = True) -> Dict:
         """
         Get stats for a single day (thread-safe helper method).
         
+        Calls are skipped while the circuit breaker is open, and failed or
+        skipped days fall back to the last data fetched for that date.
+        
         Args:
             date_str: Date string in YYYY-MM-DD format
+            on_start: Called once the rate budget allows the request, just before it is sent
+            use_cache: Keep the result as the day's fallback (exports pass False
+                so they do not hold every exported day in memory)
             
         Returns:
             Dictionary containing date and calories data
         """
+        if not self.breaker.allow():
+            return self._fallback_day_stats(date_str, 'circuit_open')
+        
+        self._acquire_budget()
+        if on_start is not None:
+            on_start()
+        started = time.monotonic()
         try:
             daily_stats = self.client.get_stats(date_str)
-            # Coerce to numeric values and guard against None
-            def coerce_number(val):
-                try:
-                    return float(val) if val is not None else 0.0
-                except Exception:
-                    return 0.0
-
-            active_calories = coerce_number(daily_stats.get('activeKilocalories'))
-            total_calories = coerce_number(daily_stats.get('totalKilocalories'))
-            bmr_calories = coerce_number(daily_stats.get('bmrKilocalories'))
-
-            return {
-                'date': date_str,
-                'active_calories': active_calories,
-                'total_calories': total_calories,
-                'bmr_calories': bmr_calories
-            }
         except GarminConnectTooManyRequestsError:
             print(f"⚠️  Rate limit reached for {date_str}")
-            return {
-                'date': date_str,
-                'active_calories': 0,
-                'total_calories': 0,
-                'bmr_calories': 0,
-                'error': 'rate_limit'
-            }
+            self.breaker.record_failure()
+            return self._fallback_day_stats(date_str, 'rate_limit')
         except Exception as e:
             print(f"⚠️  Error getting data for {date_str}: {e}")
-            return {
-                'date': date_str,
-                'active_calories': 0,
-                'total_calories': 0,
-                'bmr_calories': 0,
-                'error': str(e)
-            }
+            self.breaker.record_failure()
+            return self._fallback_day_stats(date_str, str(e))
+        self.latency.record(time.monotonic() - started)
+        self.breaker.record_success()
+        
+        # Coerce to numeric values and guard against None
+        def coerce_number(val):
+            try:
+                return float(val) if val is not None else 0.0
+            except Exception:
+                return 0.0
+
+        daily_stats = daily_stats or {}
+        result = {
+            'date': date_str,
+            'active_calories': coerce_number(daily_stats.get('activeKilocalories')),
+            'total_calories': coerce_number(daily_stats.get('totalKilocalories')),
+            'bmr_calories': coerce_number(daily_stats.get('bmrKilocalories'))
+        }
+        if use_cache:
+            self._stats_cache[date_str] = result
+        return result
+
+    def _fallback_day_stats(self, date_str: str, error: str) -> Dict:
+        """Last good stats for a day (marked as cached), or an error entry."""
+        cached = self._stats_cache.get(date_str)
+        if cached is not None:
+            return dict(cached, cached=True)
+        return {
+            'date': date_str,
+            'active_calories': 0,
+            'total_calories': 0,
+            'bmr_calories': 0,
+            'error': error
+        }
 
-    def get_daily_active_calories(self, start_date: datetime, end_date: datetime, use_concurrent: bool = True, max_workers: int = 20) -> List[Dict]:
+    def _fetch_days_concurrently(self, date_list: List[str], max_workers: int,
+                                 tenant: Optional[str] = None, priority: int = INTERACTIVE,
+                                 use_cache: bool = True) -> List[Dict]:
+        """
+        Fetch many days concurrently with per-call deadlines and hedging.
+        
+        Calls run on the process-wide fair scheduler as `tenant`, with at most
+        max_workers of them in flight at once. A call running longer than the
+        observed p95 latency gets a duplicate request at the front of the
+        tenant's queue, and the first copy to return fresh data wins; an
+        error or cached fallback is only kept once every copy has failed.
+        Calls exceeding call_timeout, and anything still outstanding after
+        fetch_timeout (unless it is None), fall back to cached data instead of
+        holding up the whole fetch. Threads stuck in a slow call are
+        abandoned, not waited for. With use_cache=False fetched days are not
+        kept as fallbacks (see _get_single_day_stats).
+        """
+        total_days = len(date_list)
+        results: Dict[str, Dict] = {}
+        # Fallback results held back while another copy of the day is still running
+        fallbacks: Dict[str, Dict] = {}
+        started: Dict[str, float] = {}
+        hedged = set()
+        max_hedges = max(1, int(total_days * MAX_HEDGE_FRACTION))
+        fetch_deadline = time.monotonic() + self.fetch_timeout if self.fetch_timeout is not None else None
+        scheduler = get_scheduler()
+        tenant = tenant or self.tenant
+
+        def timed_fetch(date_str: str) -> Dict:
+            # The call is timed from when it is sent, not while it waits for the rate budget
+            return self._get_single_day_stats(
+                date_str, on_start=lambda: started.setdefault(date_str, time.monotonic()), use_cache=use_cache
+            )
+
+        def finish(date_str: str, result: Dict):
+            results[date_str] = result
+            completed = len(results)
+            
+            # Progress indicator
+            if completed % 50 == 0 or completed == total_days:
+                print(f"  📈 Progress: {completed}/{total_days} days ({completed/total_days*100:.1f}%)")
+            
+            # Show successful data points
+            if 'error' not in result and (result.get('active_calories') or 0) > 0:
+                print(f"  ✅ {result['date']}: {result['active_calories']} active calories")
+
+        def is_fallback(result: Dict) -> bool:
+            return 'error' in result or bool(result.get('cached'))
+
+        def other_copy_running(date_str: str) -> bool:
+            return date_str in hedged and date_str in pending.values()
+
+        def settle(date_str: str, result: Dict):
+            current = results.get(date_str)
+            if current is not None:
+                # A late fresh copy still replaces a fallback
+                if is_fallback(current) and not is_fallback(result):
+                    results[date_str] = result
+                return
+            if is_fallback(result) and other_copy_running(date_str):
+                fallbacks[date_str] = result
+                return
+            fallbacks.pop(date_str, None)
+            finish(date_str, result)
+
+        pending: Dict[concurrent.futures.Future, str] = {}
+        try:
+            # Submit all requests
+            for date_str in date_list:
+                future = scheduler.submit(timed_fetch, date_str, tenant=tenant, priority=priority, limit=max_workers)
+                pending[future] = date_str
+            
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=0.05, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    settle(pending.pop(future), future.result())
+                
+                now = time.monotonic()
+                if fetch_deadline is not None and now >= fetch_deadline:
+                    print(f"⏱️  Fetch deadline reached with {len(pending)} requests outstanding")
+                    for date_str in set(pending.values()) - set(results):
+                        finish(date_str, fallbacks.pop(date_str, None) or self._fallback_day_stats(date_str, 'timeout'))
+                    break
+                
+                p95 = self.latency.percentile(95)
+                hedge_after = max(p95, MIN_HEDGE_DELAY) if p95 is not None else None
+                for future, date_str in list(pending.items()):
+                    if date_str in results:
+                        # The other copy of a hedged call won; drop this one if still queued
+                        pending.pop(future)
+                        future.cancel()
+                        continue
+                    if date_str not in started:
+                        continue  # still queued
+                    elapsed = now - started[date_str]
+                    if elapsed >= self.call_timeout:
+                        pending.pop(future)
+                        if not other_copy_running(date_str):
+                            settle(date_str, fallbacks.pop(date_str, None)
+                                   or self._fallback_day_stats(date_str, 'timeout'))
+                    elif (hedge_after is not None and elapsed >= hedge_after
+                          and date_str not in hedged and len(hedged) < max_hedges):
+                        hedged.add(date_str)
+                        hedge = scheduler.submit(self._get_single_day_stats, date_str,
+                                                 tenant=tenant, priority=priority, urgent=True)
+                        pending[hedge] = date_str
+        finally:
+            # Drop calls that never started; stuck ones are abandoned, not waited for
+            for future in pending:
+                future.cancel()
+        
+        if hedged:
+            print(f"  🔁 Hedged {len(hedged)} slow requests")
+        
+        # Sort by date to maintain chronological order
+        return [results[date_str] for date_str in sorted(results)]
+
+    def get_daily_active_calories(self, start_date: datetime, end_date: datetime, use_concurrent: bool = True,
+                                  max_workers: int = 20, tenant: Optional[str] = None,
+                                  priority: int = INTERACTIVE) -> List[Dict]:
         """
         Get daily active calories data for a date range using concurrent requests for speed.
         
@@ -125,7 +309,9 @@ class GarminDataExtractor:
             start_date: Start date for data extraction
             end_date: End date for data extraction
             use_concurrent: Whether to use concurrent requests (default: True)
-            max_workers: Maximum number of concurrent workers (default: 20)
+            max_workers: Maximum number of concurrent requests for this fetch (default: 20)
+            tenant: Who the fetch is for when scheduling fairly (default: the logged-in account)
+            priority: scheduler.INTERACTIVE or scheduler.BACKGROUND
             
         Returns:
             List of dictionaries containing date and active calories data
@@ -146,30 +332,7 @@ class GarminDataExtractor:
         
         if use_concurrent and total_days > 1:
             # Use concurrent requests for much faster data retrieval
-            data = []
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all requests
-                future_to_date = {executor.submit(self._get_single_day_stats, date_str): date_str 
-                                for date_str in date_list}
-                
-                # Collect results as they complete
-                completed = 0
-                for future in concurrent.futures.as_completed(future_to_date):
-                    result = future.result()
-                    data.append(result)
-                    completed += 1
-                    
-                    # Progress indicator
-                    if completed % 50 == 0 or completed == total_days:
-                        print(f"  📈 Progress: {completed}/{total_days} days ({completed/total_days*100:.1f}%)")
-                    
-                    # Show successful data points
-                    if 'error' not in result and (result.get('active_calories') or 0) > 0:
-                        print(f"  ✅ {result['date']}: {result['active_calories']} active calories")
-            
-            # Sort by date to maintain chronological order
-            data.sort(key=lambda x: x['date'])
+            data = self._fetch_days_concurrently(date_list, max_workers, tenant=tenant, priority=priority)
             
         else:
             # Fall back to sequential requests
@@ -190,9 +353,35 @@ class GarminDataExtractor:
         error_count = len(data) - len(valid_data)
         
         print(f"✅ Data extraction complete: {len(valid_data)} successful, {error_count} errors")
-        
+
         return data
-    
+
+    def get_intraday_heart_rates(self, date_str: str) -> Optional[Tuple[List[int], List[int]]]:
+        """
+        Get one day's intraday heart-rate samples.
+
+        Args:
+            date_str: Date string in YYYY-MM-DD format
+
+        Returns:
+            (epoch seconds, bpm) lists in time order, or None if the call failed
+        """
+        if not self.authenticated:
+            raise Exception("Not authenticated. Please login first.")
+        if not self.intraday_breaker.allow():
+            return None
+
+        from intraday import parse_heart_rates
+        self._acquire_budget()
+        try:
+            response = self.client.get_heart_rates(date_str)
+        except Exception as e:
+            print(f"⚠️  Error getting heart rate for {date_str}: {e}")
+            self.intraday_breaker.record_failure()
+            return None
+        self.intraday_breaker.record_success()
+        return parse_heart_rates(response)
+
     def calculate_30_day_average(self, data: List[Dict]) -> float:
         """Calculate 30-day average of active calories."""
         if not data:
@@ -214,35 +403,7 @@ class GarminDataExtractor:
         Returns:
             Percentage change from previous 30-day period to current 30-day period
         """
-        if len(data) < 60:
-            return 0.0
-        
-        # Last 30 days
-        recent_30 = data[-30:]
-        recent_calories = [
-            (day.get('active_calories') or 0)
-            for day in recent_30
-            if (day.get('active_calories') or 0) > 0
-        ]
-        
-        # Previous 30 days (30-60 days ago)
-        previous_30 = data[-60:-30]
-        previous_calories = [
-            (day.get('active_calories') or 0)
-            for day in previous_30
-            if (day.get('active_calories') or 0) > 0
-        ]
-        
-        if not recent_calories or not previous_calories:
-            return 0.0
-        
-        recent_avg = statistics.mean(recent_calories)
-        previous_avg = statistics.mean(previous_calories)
-        
-        if previous_avg == 0:
-            return 0.0
-        
-        return ((recent_avg - previous_avg) / previous_avg) * 100
+        return self.calculate_insights(data)['ramp_rate']
     
     def get_monthly_averages(self, data: List[Dict]) -> List[Dict]:
         """
@@ -251,37 +412,130 @@ class GarminDataExtractor:
         Returns:
             List of dictionaries with month and average active calories
         """
-        if not data:
-            return []
-        
-        # Group data by month
-        monthly_data = {}
-        
-        for day in data:
-            date_obj = datetime.strptime(day['date'], '%Y-%m-%d')
-            month_key = date_obj.strftime('%Y-%m')
-            
-            if month_key not in monthly_data:
-                monthly_data[month_key] = []
-            
-            if day['active_calories'] > 0:
-                monthly_data[month_key].append(day['active_calories'])
-        
-        # Calculate averages and format for chart
-        monthly_averages = []
-        for month, calories_list in monthly_data.items():
-            if calories_list:
-                avg_calories = statistics.mean(calories_list)
-                monthly_averages.append({
-                    'month': month,
-                    'average_calories': round(avg_calories, 1),
-                    'days_recorded': len(calories_list)
-                })
-        
-        # Sort by month and return last 12 months
-        monthly_averages.sort(key=lambda x: x['month'])
-        return monthly_averages[-12:]
-    
+        return self.calculate_insights(data)['monthly_data']
+
+    def calculate_insights(self, data: List[Dict]) -> Dict[str, Any]:
+        """
+        Compute every dashboard insight in a single pass over the daily series.
+
+        Replaces the separate scans for the 30-day average, ramp rate, monthly
+        averages, best month, biggest day, 3-month average and annual average,
+        and adds streaks and percentiles of active days.
+        Adding a new insight means adding an accumulator here rather than
+        another walk over the data.
+
+        Args:
+            data: Chronologically sorted daily stats from get_daily_active_calories
+
+        Returns:
+            Dictionary of insight values (see keys below)
+        """
+        n = len(data)
+        recent_start = n - 30
+        previous_start = n - 60
+        quarter_start = n - 90
+
+        recent_sum = recent_count = 0.0
+        previous_sum = previous_count = 0.0
+        quarter_sum = quarter_count = 0.0
+        # Per month: [total active calories, active day count]
+        month_sums: Dict[str, List[Any]] = {}
+        active_values: List[float] = []
+        biggest_day: Optional[Dict] = None
+        biggest_value = 0.0
+        current_streak = longest_streak = 0
+
+        for i, day in enumerate(data):
+            calories = day.get('active_calories') or 0
+
+            if biggest_day is None or calories > biggest_value:
+                biggest_day = day
+                biggest_value = calories
+
+            month_key = day['date'][:7]
+            month_acc = month_sums.get(month_key)
+            if month_acc is None:
+                month_acc = month_sums[month_key] = [0.0, 0]
+
+            if calories <= 0:
+                current_streak = 0
+                continue
+
+            month_acc[0] += calories
+            month_acc[1] += 1
+            active_values.append(calories)
+
+            current_streak += 1
+            if current_streak > longest_streak:
+                longest_streak = current_streak
+
+            if i >= recent_start:
+                recent_sum += calories
+                recent_count += 1
+            elif i >= previous_start:
+                previous_sum += calories
+                previous_count += 1
+            if i >= quarter_start:
+                quarter_sum += calories
+                quarter_count += 1
+
+        # Monthly averages over the last 12 months with data
+        monthly_averages = [
+            {
+                'month': month,
+                'average_calories': round(total / count, 1),
+                'days_recorded': int(count)
+            }
+            for month, (total, count) in sorted(month_sums.items())
+            if count
+        ][-12:]
+
+        best_month = None
+        for month in monthly_averages:
+            if best_month is None or month['average_calories'] > best_month['average_calories']:
+                best_month = month
+
+        annual_average = (
+            sum(m['average_calories'] for m in monthly_averages) / len(monthly_averages)
+            if monthly_averages else 0.0
+        )
+
+        recent_avg = recent_sum / recent_count if recent_count else 0.0
+        previous_avg = previous_sum / previous_count if previous_count else 0.0
+
+        # Ramp rate and calorie change need two full 30-day windows with activity
+        ramp_rate = 0.0
+        calorie_change = 0.0
+        if n >= 60 and recent_count and previous_count:
+            calorie_change = recent_avg - previous_avg
+            if previous_avg:
+                ramp_rate = (calorie_change / previous_avg) * 100
+
+        # Percentiles of active-day calories (nearest rank)
+        percentiles: Dict[str, float] = {}
+        if active_values:
+            active_values.sort()
+            last = len(active_values) - 1
+            for p in (25, 50, 75, 90):
+                percentiles[f'p{p}'] = active_values[round(last * p / 100)]
+
+        return {
+            # Averages over active (non-zero) days, as in calculate_30_day_average;
+            # with fewer than 30 days the window is simply the whole series
+            'avg_30_day': recent_avg,
+            'ramp_rate': ramp_rate,
+            'calorie_change': calorie_change,
+            'three_month_avg': quarter_sum / quarter_count if quarter_count else 0.0,
+            'monthly_data': monthly_averages,
+            'best_month': best_month,
+            'biggest_day': biggest_day,
+            'annual_average': annual_average,
+            'current_streak': current_streak,
+            'longest_streak': longest_streak,
+            'active_days': len(active_values),
+            'percentiles': percentiles,
+        }
+
     def _extract_activity_fields(self, activity: Dict[str, Any]) -> Tuple[str, float, str]:
         """
         Extract activity type, calories, and date string from a Garmin activity object.
@@ -328,27 +582,97 @@ class GarminDataExtractor:
 
         return activity_type, calories, date_str
 
-    def _get_activities_in_range(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+    def get_activity_aggregates(self, activities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Total activity calories per day and activity type.
+
+        Returns:
+            List of { date: str, type: str, calories: float, count: int },
+            sorted by date then type
+        """
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        for act in activities:
+            act_type, cals, date_str = self._extract_activity_fields(act)
+            if not date_str:
+                continue
+            display_type = str(act_type).replace('_', ' ').title() if act_type else 'Unknown'
+            entry = totals.setdefault((date_str, display_type), [0.0, 0])
+            entry[0] += cals
+            entry[1] += 1
+
+        return [
+            {'date': date_str, 'type': act_type, 'calories': total, 'count': int(count)}
+            for (date_str, act_type), (total, count) in sorted(totals.items())
+        ]
+
+    def _call_upstream(self, fn: Any, *args: Any, tenant: Optional[str] = None,
+                       priority: int = INTERACTIVE) -> Any:
+        """
+        Run one client call on the process-wide scheduler and wait for its result.
+
+        Once the call starts it has call_timeout seconds to finish; time spent
+        queued behind other calls does not count. A call that runs over is
+        abandoned, not waited for.
+
+        Raises:
+            TimeoutError: If the call runs longer than call_timeout
+        """
+        self._acquire_budget()
+        future = get_scheduler().submit(fn, *args, tenant=tenant or self.tenant, priority=priority)
+        while not (future.running() or future.done()):
+            time.sleep(0.01)
+        try:
+            return future.result(timeout=self.call_timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"{getattr(fn, '__name__', 'Garmin call')} timed out after {self.call_timeout:g}s")
+
+    def _get_activities_in_range(self, start_date: datetime, end_date: datetime,
+                                 use_cache: bool = True, strict: bool = False,
+                                 tenant: Optional[str] = None, priority: int = INTERACTIVE) -> List[Dict[str, Any]]:
         """
         Fetch activities from Garmin within the given date range using the most
         efficient available API in the client. Falls back to pagination if needed.
+
+        With use_cache=False the result is not kept as a fallback, so long
+        exports do not hold every fetched activity in memory.
+
+        With strict=True an upstream failure raises instead of returning cached,
+        partial or empty results, for callers such as exports that must be
+        complete.
+
+        Client calls are queued on the process-wide scheduler as `tenant`
+        (default: the logged-in user) with the given priority.
         """
         if not self.authenticated:
             raise Exception("Not authenticated. Please login first.")
 
         activities: List[Dict[str, Any]] = []
+        cache_key = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+        # Fail fast to the last result for this range while Garmin is degraded
+        if not self.breaker.allow():
+            if strict:
+                raise Exception("Garmin unavailable (circuit open)")
+            print("⚠️  Garmin unavailable (circuit open), using cached activities")
+            return self._activities_cache.get(cache_key, [])
 
         # First preference: API that fetches by date range directly
         if hasattr(self.client, 'get_activities_by_date'):
             try:
-                activities = self.client.get_activities_by_date(
-                    start_date.strftime('%Y-%m-%d'),
-                    end_date.strftime('%Y-%m-%d')
-                ) or []
+                activities = self._call_upstream(self.client.get_activities_by_date, *cache_key,
+                                                 tenant=tenant, priority=priority) or []
+                self.breaker.record_success()
+                if use_cache:
+                    self._activities_cache[cache_key] = activities
                 return activities
-            except Exception:
-                # Fall through to pagination approach
-                pass
+            except Exception as e:
+                print(f"⚠️  Error getting activities by date ({e})")
+                self.breaker.record_failure()
+                # Garmin is struggling; paging would only add more slow calls
+                if isinstance(e, TimeoutError) or self.breaker.state == CircuitBreaker.OPEN:
+                    if strict:
+                        raise Exception(f"Error getting activities by date: {e}")
+                    return self._activities_cache.get(cache_key, [])
 
         # Fallback: page through recent activities until we cover the range
         # Many users have < 1000 activities for a year; we page in reasonable chunks
@@ -356,8 +680,15 @@ class GarminDataExtractor:
         page_size = 200
         while True:
             try:
-                batch = self.client.get_activities(page_start, page_size) or []
-            except Exception:
+                batch = self._call_upstream(self.client.get_activities, page_start, page_size,
+                                            tenant=tenant, priority=priority) or []
+            except Exception as e:
+                print(f"⚠️  Error paging activities: {e}")
+                self.breaker.record_failure()
+                if strict:
+                    raise Exception(f"Error paging activities: {e}")
+                if not activities:
+                    return self._activities_cache.get(cache_key, [])
                 break
 
             if not batch:
@@ -398,13 +729,16 @@ class GarminDataExtractor:
             except Exception:
                 continue
 
+        if use_cache:
+            self._activities_cache[cache_key] = filtered
         return filtered
 
     def get_activity_calories_breakdown(
         self,
         start_date: datetime,
         end_date: datetime,
-        daily_stats: List[Dict]
+        daily_stats: List[Dict],
+        activities: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
         Compute average daily active calories over the last 30 days by Garmin
@@ -412,6 +746,9 @@ class GarminDataExtractor:
         for the portion of daily active calories not associated with recorded
         activities.
 
+        Activities for the last-30-day window are fetched unless already
+        provided (e.g. by a prefetch job).
+
         Returns a dict with keys:
             - by_type: List[{ type: str, calories: float, percent: float }]
             - total_active_avg: float  (average daily active calories)
@@ -431,7 +768,8 @@ class GarminDataExtractor:
         last30_stats = [d for d in daily_stats if d.get('date') in last30_dates]
 
         # Fetch activities only for the last 30-day window
-        activities = self._get_activities_in_range(last30_start, end_date)
+        if activities is None:
+            activities = self._get_activities_in_range(last30_start, end_date)
 
         # Aggregate calories by activity type PER DAY first, to reconcile with daily active calories
         type_cals_by_date: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
@@ -520,29 +858,39 @@ class GarminDataExtractor:
             
             if not raw_data:
                 return {'error': 'No data found'}
-            
-            # Calculate metrics
-            avg_30_day = self.calculate_30_day_average(raw_data)
-            ramp_rate = self.calculate_monthly_ramp_rate(raw_data)
-            monthly_averages = self.get_monthly_averages(raw_data)
-            
-            dashboard_data = {
-                'success': True,
-                'metrics': {
-                    'avg_30_day_calories': round(avg_30_day, 1),
-                    'monthly_ramp_rate': round(ramp_rate, 1),
-                    'total_days': len(raw_data),
-                    'active_days': len([d for d in raw_data if d['active_calories'] > 0])
-                },
-                'monthly_data': monthly_averages,
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            return dashboard_data
-            
+
+            return self.build_dashboard_data(raw_data)
+
         except Exception as e:
             return {'error': f'Data extraction failed: {str(e)}'}
 
+    def build_dashboard_data(self, raw_data: List[Dict]) -> Dict:
+        """
+        Build the dashboard metrics dictionary from already-fetched daily data.
+
+        Needs no Garmin session, so it can run anywhere the daily series is
+        available (e.g. in a worker process of the batch report generator).
+
+        Args:
+            raw_data: Daily stats as returned by get_daily_active_calories
+
+        Returns:
+            Dictionary containing all dashboard metrics (sample_data.json shape)
+        """
+        insights = self.calculate_insights(raw_data)
+
+        return {
+            'success': True,
+            'metrics': {
+                'avg_30_day_calories': round(insights['avg_30_day'], 1),
+                'monthly_ramp_rate': round(insights['ramp_rate'], 1),
+                'total_days': len(raw_data),
+                'active_days': insights['active_days']
+            },
+            'monthly_data': insights['monthly_data'],
+            'last_updated': datetime.now().isoformat()
+        }
+
 
 def main():
     """Main function for testing the data extraction."""
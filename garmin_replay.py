@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Record/Replay Layer for the Garmin Connect Client
+
+Captures the raw get_stats, activity and heart-rate responses seen by
+GarminDataExtractor into a gzip-compressed JSON-lines file, and serves them
+back later without network access or credentials. Replays run at full speed, which makes them
+suitable for profiling the data pipeline and for local load tests.
+
+Usage:
+    python garmin_replay.py record garmin_recording.jsonl.gz
+    python garmin_replay.py profile garmin_recording.jsonl.gz
+
+To serve the web app from a recording, set GARMIN_REPLAY_FILE before
+starting it; any login then uses the recorded data.
+"""
+
+import argparse
+import cProfile
+import gzip
+import json
+import pstats
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from garmin_data import GarminDataExtractor
+
+
+# Client methods whose responses are captured
+RECORDED_METHODS = ('get_stats', 'get_activities_by_date', 'get_activities', 'get_heart_rates')
+
+# Days of intraday heart rate captured by a recording
+INTRADAY_DAYS = 30
+
+# Activity fields holding timestamps, shifted when a replay is rebased
+ACTIVITY_TIME_FIELDS = ('startTimeLocal', 'startTimeGMT', 'startTime')
+
+
+class RecordingClient:
+    """Proxy around a Garmin client that writes every recorded call to disk."""
+
+    def __init__(self, client: Any, path: str):
+        self._client = client
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        # get_stats is called from many worker threads at once
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in RECORDED_METHODS:
+            return attr
+
+        def call(*args):
+            try:
+                response = attr(*args)
+            except Exception as e:
+                self._write({'method': name, 'args': list(args), 'error': str(e)})
+                raise
+            self._write({'method': name, 'args': list(args), 'response': response})
+            return response
+
+        return call
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(',', ':'), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+
+    def close(self) -> None:
+        """Flush and close the recording file."""
+        with self._lock:
+            self._file.close()
+
+
+class ReplayClient:
+    """Stand-in for the Garmin client that answers from a recording file."""
+
+    def __init__(self, path: str, rebase: bool = True, latency: float = 0.0):
+        """
+        Args:
+            path: Recording written by RecordingClient
+            rebase: Shift recorded dates so the latest recorded day is today
+            latency: Artificial delay in seconds added to every call
+        """
+        self.latency = latency
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._heart_rates: Dict[str, Dict[str, Any]] = {}
+        self._activities: Dict[str, Dict[str, Any]] = {}
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                method = entry.get('method')
+                if method == 'get_stats' and entry.get('args'):
+                    self._stats[entry['args'][0]] = entry
+                elif method == 'get_heart_rates' and entry.get('args'):
+                    self._heart_rates[entry['args'][0]] = entry
+                elif 'response' in entry and method in ('get_activities_by_date', 'get_activities'):
+                    # Pool activities from every call, so any date range can be answered
+                    for activity in entry['response'] or []:
+                        key = str(activity.get('activityId') or json.dumps(activity, sort_keys=True))
+                        self._activities[key] = activity
+
+        self.offset = timedelta(0)
+        if rebase and self._stats:
+            latest = datetime.strptime(max(self._stats), '%Y-%m-%d')
+            self.offset = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - latest
+
+        # Activities sorted newest first, with dates already shifted
+        self._activity_list = sorted(
+            (self._shift_activity(a) for a in self._activities.values()),
+            key=lambda a: _activity_time(a),
+            reverse=True,
+        )
+
+        print(f"📼 Loaded recording: {len(self._stats)} days, {len(self._activity_list)} activities, "
+              f"{len(self._heart_rates)} heart-rate days")
+
+    def login(self) -> None:
+        """Replays need no authentication."""
+        return None
+
+    def _shift_activity(self, activity: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.offset:
+            return activity
+        shifted = dict(activity)
+        for field in ACTIVITY_TIME_FIELDS:
+            value = shifted.get(field)
+            if isinstance(value, str) and len(value) >= 10:
+                try:
+                    day = datetime.strptime(value[:10], '%Y-%m-%d') + self.offset
+                    shifted[field] = day.strftime('%Y-%m-%d') + value[10:]
+                except ValueError:
+                    pass
+        return shifted
+
+    def get_stats(self, date_str: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        recorded_date = (datetime.strptime(date_str, '%Y-%m-%d') - self.offset).strftime('%Y-%m-%d')
+        entry = self._stats.get(recorded_date)
+        if entry is None:
+            raise LookupError(f"No recorded stats for {recorded_date}")
+        if 'error' in entry:
+            raise Exception(entry['error'])
+        response = dict(entry.get('response') or {})
+        if 'calendarDate' in response:
+            response['calendarDate'] = date_str
+        return response
+
+    def get_heart_rates(self, date_str: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        recorded_date = (datetime.strptime(date_str, '%Y-%m-%d') - self.offset).strftime('%Y-%m-%d')
+        entry = self._heart_rates.get(recorded_date)
+        if entry is None:
+            raise LookupError(f"No recorded heart rate for {recorded_date}")
+        if 'error' in entry:
+            raise Exception(entry['error'])
+        response = dict(entry.get('response') or {})
+        if 'calendarDate' in response:
+            response['calendarDate'] = date_str
+        # Sample timestamps are epoch milliseconds
+        shift_ms = int(self.offset.total_seconds()) * 1000
+        if shift_ms and response.get('heartRateValues'):
+            response['heartRateValues'] = [
+                [ts + shift_ms if ts is not None else None, *rest]
+                for ts, *rest in response['heartRateValues']
+            ]
+        return response
+
+    def get_activities_by_date(self, startdate: str, enddate: str, *args: Any) -> List[Dict[str, Any]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [a for a in self._activity_list if startdate <= _activity_time(a)[:10] <= enddate]
+
+    def get_activities(self, start: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._activity_list[start:start + limit]
+
+
+def _activity_time(activity: Dict[str, Any]) -> str:
+    for field in ACTIVITY_TIME_FIELDS:
+        if activity.get(field):
+            return str(activity[field]).replace('T', ' ')
+    return ''
+
+
+def enable_recording(extractor: GarminDataExtractor, path: str) -> RecordingClient:
+    """Wrap an authenticated extractor's client so its responses are recorded."""
+    if not extractor.authenticated:
+        raise Exception("Not authenticated. Please login first.")
+    recorder = RecordingClient(extractor.client, path)
+    extractor.client = recorder
+    return recorder
+
+
+def enable_replay(extractor: GarminDataExtractor, path: str, rebase: bool = True,
+                  latency: float = 0.0) -> ReplayClient:
+    """Point an extractor at a recording instead of Garmin Connect."""
+    extractor.clear_cache()
+    extractor.client = ReplayClient(path, rebase=rebase, latency=latency)
+    extractor.authenticated = True
+    return extractor.client
+
+
+def record(path: str, days: int = 365) -> None:
+    """Log in interactively and record a full dashboard fetch."""
+    email = input("Enter your Garmin Connect email: ").strip()
+    password = input("Enter your Garmin Connect password: ").strip()
+
+    extractor = GarminDataExtractor()
+    if not extractor.authenticate(email, password):
+        return
+
+    recorder = enable_recording(extractor, path)
+    try:
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days)
+        data = extractor.get_daily_active_calories(start_date, end_date)
+        extractor.get_activity_calories_breakdown(start_date, end_date, data)
+        # The days the dashboard's zone breakdown covers by default
+        for offset in range(INTRADAY_DAYS):
+            extractor.get_intraday_heart_rates((end_date - timedelta(days=offset)).strftime('%Y-%m-%d'))
+    finally:
+        recorder.close()
+    print(f"\n✅ Recording saved to '{path}'")
+
+
+def profile(path: str, days: int = 365, top: int = 25) -> None:
+    """Run the dashboard pipeline against a recording under cProfile."""
+    extractor = GarminDataExtractor()
+    enable_replay(extractor, path)
+
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    profiler = cProfile.Profile()
+    timings: Dict[str, float] = {}
+
+    def timed(label: str, fn, *args):
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profiler.disable()
+            timings[label] = time.perf_counter() - started
+
+    data = timed('get_daily_active_calories', extractor.get_daily_active_calories, start_date, end_date)
+    timed('get_activity_calories_breakdown', extractor.get_activity_calories_breakdown, start_date, end_date, data)
+    timed('calculate_insights', extractor.calculate_insights, data)
+    timed('build_dashboard_data', extractor.build_dashboard_data, data)
+
+    print("\n⏱️  Timings:")
+    print("=" * 40)
+    for label, seconds in timings.items():
+        print(f"{label}: {seconds * 1000:.1f} ms")
+
+    print()
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(top)
+
+
+def main():
+    """Command line entry point for recording and profiling."""
+    parser = argparse.ArgumentParser(description="Record Garmin responses or replay them for profiling.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Record a full dashboard fetch")
+    record_parser.add_argument('path', help="Output file (.jsonl.gz)")
+    record_parser.add_argument('--days', type=int, default=365)
+
+    profile_parser = subparsers.add_parser('profile', help="Profile the pipeline against a recording")
+    profile_parser.add_argument('path', help="Recording file (.jsonl.gz)")
+    profile_parser.add_argument('--days', type=int, default=365)
+    profile_parser.add_argument('--top', type=int, default=25, help="Number of profile rows to print")
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.path, days=args.days)
+    else:
+        profile(args.path, days=args.days, top=args.top)
+
+
+if __name__ == "__main__":
+    main()
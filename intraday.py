@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Intraday Heart-Rate Storage and Intensity Zones for Do The Work App
+
+Intraday heart rate is stored as one compressed chunk per user-day, so a
+range query such as "minutes above zone 3 in the last 30 days" opens only
+the chunks for those days and never builds per-sample Python objects.
+
+Chunk layout (all integers little-endian):
+
+    header   '<4sHHqIH'  magic b'DTHR', version, flags, first sample time
+                         (epoch seconds), sample count, highest bpm of the day
+    payload  zlib( offsets[n] int32  seconds since the previous sample,
+                   bpm[n]     uint8 )
+
+Chunks written before their day was over carry FLAG_PARTIAL and are
+fetched again once the day has passed.
+
+Zone aggregation is vectorized with numpy (listed in requirements.txt).
+numpy is imported on first use rather than with this module, so it adds
+nothing to the web app's cold start; without it the standard library is
+used instead.
+
+Garmin Connect exposes intraday heart rate (get_heart_rates) but no
+per-sample calorie stream, so only heart rate is ingested.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from scheduler import BACKGROUND, get_scheduler
+
+MAGIC = b'DTHR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqIH')
+
+# Header flag: the day was still in progress when the chunk was written
+FLAG_PARTIAL = 0x1
+
+# Zone lower bounds as fractions of max heart rate (Garmin's default % max HR zones)
+ZONE_PERCENTS = (0.5, 0.6, 0.7, 0.8, 0.9)
+ZONE_NAMES = ('Below Z1', 'Z1 Warm Up', 'Z2 Easy', 'Z3 Aerobic', 'Z4 Threshold', 'Z5 Maximum')
+
+# A sample counts for the time until the next one, but never longer than this
+# (seconds), so periods with the watch off are not credited to any zone
+MAX_SAMPLE_SECONDS = 300
+
+# Where chunks are kept unless INTRADAY_DIR is set. The temp dir is not
+# persistent on serverless hosts such as Vercel, so there days are fetched
+# again whenever a new instance starts.
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), 'do-the-work', 'intraday')
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """The numpy module, imported on first use, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def encode_day(times: Sequence[int], bpm: Sequence[int], flags: int = 0) -> bytes:
+    """
+    Pack one day of samples into a compressed chunk.
+
+    Args:
+        times: Sample times in epoch seconds, ascending
+        bpm: Heart rate for each sample
+        flags: Header flags, e.g. FLAG_PARTIAL
+    """
+    offsets = array('i', [0] * len(times))
+    for i in range(1, len(times)):
+        offsets[i] = times[i] - times[i - 1]
+    values = array('B', (max(0, min(255, int(v))) for v in bpm))
+    if not _LITTLE_ENDIAN:
+        offsets.byteswap()
+
+    header = HEADER.pack(MAGIC, VERSION, flags, times[0] if times else 0, len(values), max(values, default=0))
+    return header + zlib.compress(offsets.tobytes() + values.tobytes())
+
+
+def decode_day(blob: bytes) -> Tuple[int, int, Any, Any]:
+    """
+    Unpack a chunk written by encode_day.
+
+    Returns:
+        (first sample epoch seconds, max bpm, offsets, bpm) where offsets are
+        seconds since the previous sample; numpy arrays when numpy is
+        available, otherwise array.array
+    """
+    magic, version, _, base, count, max_bpm = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not an intraday chunk")
+    if version > VERSION:
+        raise ValueError(f"Unsupported intraday chunk version {version}")
+
+    payload = zlib.decompress(blob[HEADER.size:])
+    np = _numpy()
+    if np is not None:
+        offsets = np.frombuffer(payload, dtype='<i4', count=count)
+        bpm = np.frombuffer(payload, dtype=np.uint8, offset=count * 4, count=count)
+        return base, max_bpm, offsets, bpm
+
+    offsets = array('i')
+    offsets.frombytes(payload[:count * 4])
+    if not _LITTLE_ENDIAN:
+        offsets.byteswap()
+    bpm = array('B')
+    bpm.frombytes(payload[count * 4:])
+    return base, max_bpm, offsets, bpm
+
+
+def parse_heart_rates(response: Optional[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+    """
+    Samples from a get_heart_rates response as (epoch seconds, bpm) lists.
+
+    Samples without a reading are dropped.
+    """
+    samples = sorted(
+        (int(ts) // 1000, int(value))
+        for ts, value in ((response or {}).get('heartRateValues') or [])
+        if ts is not None and value
+    )
+    return [ts for ts, _ in samples], [value for _, value in samples]
+
+
+def zone_bounds(max_hr: float) -> List[float]:
+    """Lower bpm bound of zones 1-5 for a max heart rate."""
+    return [max_hr * pct for pct in ZONE_PERCENTS]
+
+
+def zone_seconds(offsets: Any, bpm: Any, bounds: Sequence[float]) -> List[float]:
+    """
+    Seconds spent in each zone (index 0 is below zone 1) for one day's samples.
+
+    Args:
+        offsets: Seconds since the previous sample, as returned by decode_day
+        bpm: Heart rate per sample
+        bounds: Zone lower bounds from zone_bounds
+    """
+    count = len(bpm)
+    if count == 0:
+        return [0.0] * (len(bounds) + 1)
+
+    np = _numpy()
+    if np is not None:
+        # Each sample lasts until the next one; the last repeats the previous interval
+        durations = np.empty(count, dtype=np.float64)
+        durations[:-1] = offsets[1:]
+        durations[-1] = offsets[-1] if count > 1 else 0
+        np.minimum(durations, MAX_SAMPLE_SECONDS, out=durations)
+        zones = np.searchsorted(np.asarray(bounds), bpm, side='right')
+        return np.bincount(zones, weights=durations, minlength=len(bounds) + 1).tolist()
+
+    totals = [0.0] * (len(bounds) + 1)
+    for i in range(count):
+        duration = offsets[i + 1] if i + 1 < count else (offsets[i] if count > 1 else 0)
+        zone = 0
+        while zone < len(bounds) and bpm[i] >= bounds[zone]:
+            zone += 1
+        totals[zone] += min(duration, MAX_SAMPLE_SECONDS)
+    return totals
+
+
+class IntradayStore:
+    """One compressed heart-rate chunk per user-day on local disk."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get('INTRADAY_DIR') or DEFAULT_STORE_DIR
+
+    def _user_dir(self, user: str) -> str:
+        # Usernames are hashed to keep them out of directory listings. This is
+        # not anonymization: anyone who can guess a username can hash it too.
+        return os.path.join(self.directory, hashlib.sha256(user.encode('utf-8')).hexdigest()[:32])
+
+    def _path(self, user: str, date_str: str) -> str:
+        return os.path.join(self._user_dir(user), f"{date_str}.hr")
+
+    def has_day(self, user: str, date_str: str) -> bool:
+        return os.path.exists(self._path(user, date_str))
+
+    def is_complete(self, user: str, date_str: str) -> bool:
+        """Whether a chunk is stored for the day and was written after the day ended."""
+        try:
+            with open(self._path(user, date_str), 'rb') as f:
+                magic, _, flags, _, _, _ = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return magic == MAGIC and not flags & FLAG_PARTIAL
+
+    def write_day(self, user: str, date_str: str, times: Sequence[int], bpm: Sequence[int],
+                  partial: bool = False) -> None:
+        """
+        Store one day of samples, replacing any earlier chunk for that day.
+
+        Each write goes through its own temporary file, so concurrent writes
+        for the same day never mix; the last one wins.
+
+        Args:
+            partial: The day is still in progress, so the chunk will be replaced later
+        """
+        user_dir = self._user_dir(user)
+        os.makedirs(user_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=user_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encode_day(times, bpm, flags=FLAG_PARTIAL if partial else 0))
+            os.replace(tmp_path, self._path(user, date_str))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read_day(self, user: str, date_str: str) -> Optional[Tuple[int, int, Any, Any]]:
+        """The decoded chunk for a day (see decode_day), or None if not stored."""
+        try:
+            with open(self._path(user, date_str), 'rb') as f:
+                return decode_day(f.read())
+        except (OSError, ValueError, zlib.error, struct.error):
+            return None
+
+    def zone_summary(self, user: str, dates: Sequence[str], max_hr: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Minutes per heart-rate zone over the given days.
+
+        Only the chunks for `dates` are read.
+
+        Args:
+            user: Username the chunks were stored under
+            dates: Days to include (YYYY-MM-DD)
+            max_hr: Max heart rate for the zones, default: highest bpm seen on those days
+
+        Returns:
+            {
+                'max_hr': float,
+                'days_with_data': int,
+                'zones': [{ zone: str, min_bpm: int, minutes: float }, ...],
+                'minutes_above_zone3': float
+            }
+        """
+        chunks = [chunk for chunk in (self.read_day(user, d) for d in dates) if chunk and len(chunk[3])]
+        if not max_hr:
+            max_hr = max((chunk[1] for chunk in chunks), default=0)
+
+        totals = [0.0] * (len(ZONE_PERCENTS) + 1)
+        if max_hr:
+            bounds = zone_bounds(max_hr)
+            for _, _, offsets, bpm in chunks:
+                for zone, seconds in enumerate(zone_seconds(offsets, bpm, bounds)):
+                    totals[zone] += seconds
+        else:
+            bounds = [0.0] * len(ZONE_PERCENTS)
+
+        lower_bounds = [0.0] + bounds
+        return {
+            'max_hr': float(max_hr),
+            'days_with_data': len(chunks),
+            'zones': [
+                {'zone': ZONE_NAMES[i], 'min_bpm': int(round(lower_bounds[i])), 'minutes': round(totals[i] / 60, 1)}
+                for i in range(len(totals))
+            ],
+            'minutes_above_zone3': round(sum(totals[4:]) / 60, 1),
+        }
+
+
+def date_range(days: int, end: Optional[date] = None) -> List[str]:
+    """The last `days` dates up to and including `end` (default: today)."""
+    end = end or date.today()
+    return [(end - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+
+
+def ingest_heart_rates(extractor: Any, store: IntradayStore, user: str, dates: Sequence[str],
+                       max_workers: int = 4, priority: int = BACKGROUND) -> int:
+    """
+    Fetch and store intraday heart rate for days not stored completely yet.
+
+    Completed days are fetched once; today is always refreshed, and a day
+    stored while it was still in progress is fetched again after it ends.
+    Requests are scheduled for the user with the given priority: background
+    by default, interactive when a page is waiting for the result.
+
+    Returns:
+        Number of days fetched
+    """
+    today = date.today().isoformat()
+    missing = [d for d in dates if d >= today or not store.is_complete(user, d)]
+    if not missing:
+        return 0
+
+    def fetch(date_str: str) -> bool:
+        samples = extractor.get_intraday_heart_rates(date_str)
+        if samples is None:
+            return False
+        store.write_day(user, date_str, *samples, partial=date_str >= today)
+        return True
+
+    scheduler = get_scheduler()
+    futures = [scheduler.submit(fetch, d, tenant=user, priority=priority, limit=max_workers) for d in missing]
+    fetched = sum(future.result() for future in futures)
+    print(f"💓 Stored intraday heart rate for {fetched}/{len(missing)} days")
+    return fetched
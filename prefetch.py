@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Background Prefetch for Do The Work App
+
+Starts fetching a user's dashboard inputs (the daily series and the 30-day
+activity window) as soon as they log in, so the Garmin requests overlap the
+login redirect and the browser's page load. The dashboard then attaches to
+the in-flight job instead of starting its own fetch.
+
+Each job runs on its own thread, so a long fetch never holds up another
+user's job; the number of Garmin requests in flight is bounded by the
+process-wide scheduler (see scheduler.py), not here.
+
+Note that on serverless platforms the background thread only makes progress
+while the instance is running, which in practice means while the browser is
+following the redirect to /dashboard.
+"""
+
+import concurrent.futures
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import profiling
+
+# Completed jobs are reused for this many seconds before fetching again
+JOB_TTL_SECONDS = 300
+
+# Days of history fetched for the dashboard
+HISTORY_DAYS = 365
+
+# Longest a page waits for a job; the job itself keeps running for the next attempt
+WAIT_TIMEOUT_SECONDS = 60.0
+
+_jobs: Dict[str, Tuple[float, concurrent.futures.Future]] = {}
+_lock = threading.Lock()
+
+
+def fetch_dashboard_inputs(extractor: Any, days: int = HISTORY_DAYS, tenant: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch everything the dashboard needs from Garmin Connect.
+
+    Args:
+        extractor: Authenticated GarminDataExtractor
+        days: Days of daily history to fetch
+        tenant: User the upstream calls are scheduled for (interactive priority)
+
+    Returns:
+        Dictionary with start_date, end_date, daily (daily stats) and
+        activities (activities in the last 30 days of the window)
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+
+    daily = extractor.get_daily_active_calories(start_date, end_date, tenant=tenant)
+    activities = extractor._get_activities_in_range(max(start_date, end_date - timedelta(days=29)), end_date,
+                                                    tenant=tenant)
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'daily': daily,
+        'activities': activities,
+    }
+
+
+def _run_job(future: concurrent.futures.Future, fn: Any, *args: Any, **kwargs: Any) -> None:
+    """Thread target: run fn and resolve future with its outcome."""
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
+
+
+def _is_reusable(started: float, future: concurrent.futures.Future, now: float) -> bool:
+    """Whether a job is still running or succeeded less than JOB_TTL_SECONDS ago."""
+    if not future.done():
+        return True
+    return future.exception() is None and now - started < JOB_TTL_SECONDS
+
+
+def start_prefetch(key: str, extractor: Any) -> concurrent.futures.Future:
+    """
+    Start a background fetch for a user unless a usable job already exists.
+
+    A job is reused while it is still running, or when it finished
+    successfully less than JOB_TTL_SECONDS ago. Jobs past that point are
+    dropped for every user, so users who never log out do not keep their
+    dashboard data in memory.
+
+    Args:
+        key: Identifies the user (e.g. the session username)
+        extractor: Authenticated GarminDataExtractor
+
+    Returns:
+        Future resolving to the fetch_dashboard_inputs dictionary
+    """
+    with _lock:
+        now = time.monotonic()
+        for stale in [k for k, (started, future) in _jobs.items() if not _is_reusable(started, future, now)]:
+            del _jobs[stale]
+
+        job = _jobs.get(key)
+        if job is not None:
+            return job[1]
+
+        print(f"🔄 Prefetching dashboard data for {key}")
+        # A job started by a profiled request reports its extractor calls to that profile
+        fetch = profiling.wrap_current(fetch_dashboard_inputs)
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        threading.Thread(target=_run_job, args=(future, fetch, extractor), kwargs={'tenant': key or None},
+                         daemon=True, name='prefetch').start()
+        _jobs[key] = (time.monotonic(), future)
+        return future
+
+
+def get_dashboard_inputs(key: str, extractor: Any, timeout: Optional[float] = WAIT_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """
+    Wait for the user's prefetch job, starting one if none is usable.
+
+    Raises:
+        TimeoutError: If the job is still running after `timeout` seconds
+    """
+    try:
+        return start_prefetch(key, extractor).result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        raise TimeoutError("Garmin Connect is responding slowly; your data is still loading, please refresh shortly")
+
+
+def discard(key: str) -> None:
+    """Forget a user's job (e.g. on logout) so the next login fetches fresh data."""
+    with _lock:
+        _jobs.pop(key, None)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+On-Demand Request Profiling for Do The Work App
+
+Profiles individual requests in production without a redeploy. A request is
+profiled when it carries an X-Profile header matching PROFILE_TOKEN, or when
+it falls in the PROFILE_SAMPLE_RATE fraction of traffic. For each profiled
+request the following files are written to PROFILE_DIR:
+
+    <id>.collapsed     Sampled stacks of every thread in collapsed format
+                       (flamegraph.pl, speedscope), including pool workers
+    <id>.pstats        cProfile of the request thread (snakeviz, pstats)
+    <id>.memory.txt    Peak traced memory and the largest allocation sites
+    <id>.summary.json  Wall time per named section (prefetch wait, metrics,
+                       rendering, JSON encoding, extractor methods)
+
+Extractor methods run by a prefetch job count as sections when the profiled
+request started that job; a job already running since login is not profiled.
+
+Only one request is profiled at a time; others run normally meanwhile.
+
+Environment:
+    PROFILE_TOKEN        Secret value for the X-Profile header (unset: header ignored)
+    PROFILE_SAMPLE_RATE  Fraction of requests profiled at random (default: 0)
+    PROFILE_DIR          Output directory (default: <tmp>/do-the-work/profiles)
+"""
+
+import cProfile
+import functools
+import hmac
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+PROFILE_HEADER = 'x-profile'
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+
+# Allocation sites listed in the memory report
+TOP_ALLOCATIONS = 25
+
+# Extractor methods timed as sections while a request is being profiled
+EXTRACTOR_METHODS = (
+    'get_daily_active_calories',
+    '_get_activities_in_range',
+    'calculate_insights',
+    'get_activity_aggregates',
+    'get_activity_calories_breakdown',
+    'build_dashboard_data',
+)
+
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'do-the-work', 'profiles')
+
+try:
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0') or 0)
+except ValueError:
+    PROFILE_SAMPLE_RATE = 0.0
+
+# cProfile and tracemalloc are process-wide, so profiles never overlap
+_busy = threading.Lock()
+_local = threading.local()
+
+
+def enabled() -> bool:
+    """Whether any request can be profiled with the current configuration."""
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def should_profile(headers: Mapping[str, str]) -> bool:
+    """Whether a request with these headers should be profiled."""
+    token = headers.get(PROFILE_HEADER)
+    if token and PROFILE_TOKEN and hmac.compare_digest(token, PROFILE_TOKEN):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def current() -> Optional['RequestProfile']:
+    """The profile running on this thread, if any."""
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    """Time a block as a named section of the current profile (no-op otherwise)."""
+    profile = current()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_section(name, time.perf_counter() - started)
+
+
+@contextmanager
+def bind(profile: Optional['RequestProfile']) -> Iterator[None]:
+    """Make `profile` the current profile on this thread for the duration of the block."""
+    previous = current()
+    _local.profile = profile
+    try:
+        yield
+    finally:
+        _local.profile = previous
+
+
+def wrap_current(fn: Callable) -> Callable:
+    """
+    Bind the calling thread's profile to `fn` so its sections are recorded
+    when it runs on another thread (e.g. an executor job).
+
+    Returns fn unchanged when no profile is running.
+    """
+    profile = current()
+    if profile is None:
+        return fn
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        with bind(profile):
+            return fn(*args, **kwargs)
+
+    return bound
+
+
+def instrument(obj: Any, method_names: Iterable[str]) -> None:
+    """Replace methods on an instance with versions timed as profile sections."""
+    for name in method_names:
+        method = getattr(obj, name, None)
+        if method is None or getattr(method, '_profiled', False):
+            continue
+
+        def timed(*args, _method=method, _label=f"{type(obj).__name__}.{name}", **kwargs):
+            if current() is None:
+                return _method(*args, **kwargs)
+            with section(_label):
+                return _method(*args, **kwargs)
+
+        functools.update_wrapper(timed, method)
+        timed._profiled = True
+        setattr(obj, name, timed)
+
+
+class StackSampler(threading.Thread):
+    """Background thread counting the stacks of all other threads."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                frames.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(f.replace(';', ':') for f in reversed(frames))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfile:
+    """
+    Profiles the block it wraps on the current thread.
+
+    Usage:
+        with RequestProfile('dashboard') as profile:
+            ...
+        profile.profile_id  # None if another profile was already running
+    """
+
+    def __init__(self, label: str, directory: Optional[str] = None):
+        self.label = label
+        self.directory = directory or PROFILE_DIR
+        self.profile_id: Optional[str] = None
+        self.sections: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started_tracemalloc = False
+        self._started = 0.0
+
+    def add_section(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self.sections.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def __enter__(self) -> 'RequestProfile':
+        if not _busy.acquire(blocking=False):
+            return self
+        self.profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{self.label}-{os.getpid()}"
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+
+        self._sampler = StackSampler()
+        self._sampler.start()
+        self._profiler = cProfile.Profile()
+        _local.profile = self
+        self._started = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.profile_id is None:
+            return
+        self._profiler.disable()
+        wall = time.perf_counter() - self._started
+        _local.profile = None
+        self._sampler.stop()
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._write(wall, peak, snapshot)
+        except Exception as e:
+            print(f"⚠️  Could not write profile {self.profile_id}: {e}")
+        finally:
+            _busy.release()
+
+    def _write(self, wall: float, peak: int, snapshot: tracemalloc.Snapshot) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, self.profile_id)
+
+        with open(f"{base}.collapsed", 'w') as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self._profiler.dump_stats(f"{base}.pstats")
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        with open(f"{base}.memory.txt", 'w') as f:
+            f.write(f"Peak traced memory: {peak / 1024 / 1024:.2f} MiB\n")
+            f.write("\nLargest live allocation sites at end of request:\n")
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+
+        summary = {
+            'label': self.label,
+            'wall_seconds': round(wall, 4),
+            'peak_memory_bytes': peak,
+            'stack_samples': self._sampler.samples,
+            'sections': [
+                {'name': name, 'seconds': round(seconds, 4), 'calls': calls}
+                for name, (seconds, calls) in sorted(self.sections.items(), key=lambda kv: -kv[1][0])
+            ],
+        }
+        with open(f"{base}.summary.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"🔬 Profile written: {base}.* ({wall * 1000:.0f} ms, peak {peak / 1024 / 1024:.1f} MiB)")
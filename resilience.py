@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tail-Latency Helpers for Garmin Connect Calls
+
+LatencyTracker keeps a rolling window of call latencies so callers can hedge
+(send a duplicate request) once a call runs longer than the observed p95.
+CircuitBreaker stops sending requests after repeated failures, so a degraded
+Garmin API fails fast to cached data instead of stalling every request.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class LatencyTracker:
+    """Rolling window of call latencies in seconds."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of most recent latencies kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Latency at percentile p (0-100), or None while there are too few samples.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures
+    it opens and rejects calls for `reset_timeout` seconds, then lets a
+    single trial call through (half-open). A successful trial closes it
+    again; a failed one re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"🔌 Circuit breaker opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Process-Wide Fair Scheduler for Garmin Connect Calls
+
+Every upstream call in the process goes through one shared pool of worker
+threads instead of a thread pool per request. Queued calls are grouped by
+tenant (the user or athlete they are made for) and served round-robin, so
+one user's year-long backfill cannot starve another user's dashboard load.
+Interactive calls are served before background work (batch runs, exports,
+intraday ingestion), but background work still gets at least one slot in
+every BACKGROUND_SHARE dispatches so it always makes progress.
+
+Usage:
+    future = get_scheduler().submit(fetch, day, tenant='jane', priority=BACKGROUND)
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Upstream calls in flight across the whole process unless UPSTREAM_CONCURRENCY is set
+MAX_CONCURRENCY = int(os.environ.get('UPSTREAM_CONCURRENCY', '20'))
+
+# When both kinds of work are waiting, one in this many dispatches goes to background work
+BACKGROUND_SHARE = 5
+
+
+class _Task:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'tenant', 'limit')
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, tenant: str, limit: Optional[int]):
+        self.future: Future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tenant = tenant
+        self.limit = limit
+
+
+class FairScheduler:
+    """
+    Shared worker pool with per-tenant round-robin queues and two priorities.
+
+    Worker threads are started on demand, up to max_concurrency.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, name: str = 'upstream'):
+        """
+        Args:
+            max_concurrency: Calls allowed to run at the same time across all tenants
+            name: Prefix for worker thread names
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.name = name
+        self._cond = threading.Condition()
+        self._queues: Dict[int, 'OrderedDict[str, Deque[_Task]]'] = {
+            INTERACTIVE: OrderedDict(),
+            BACKGROUND: OrderedDict(),
+        }
+        self._in_flight: Dict[str, int] = {}
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._running = 0
+        self._dispatched = 0
+
+    def submit(self, fn: Callable, *args: Any, tenant: str = 'default', priority: int = INTERACTIVE,
+               limit: Optional[int] = None, urgent: bool = False, **kwargs: Any) -> Future:
+        """
+        Queue a call.
+
+        Args:
+            fn: Callable to run on a worker thread
+            tenant: Whose call this is; tenants share capacity round-robin
+            priority: INTERACTIVE or BACKGROUND
+            limit: Most calls this tenant may have running while this one starts
+            urgent: Put the call at the front of the tenant's queue (e.g. hedges)
+
+        Returns:
+            Future for the call's result; cancelling it drops the call if not started
+        """
+        task = _Task(fn, args, kwargs, tenant, limit)
+        with self._cond:
+            queue = self._queues[priority].setdefault(tenant, deque())
+            if urgent:
+                queue.appendleft(task)
+            else:
+                queue.append(task)
+            if self._idle == 0 and len(self._threads) < self.max_concurrency:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name=f"{self.name}-{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return task.future
+
+    def queued(self) -> Dict[int, int]:
+        """Number of waiting calls per priority."""
+        with self._cond:
+            return {priority: sum(len(q) for q in tenants.values())
+                    for priority, tenants in self._queues.items()}
+
+    def _next_task(self) -> Optional[_Task]:
+        """Pop the next runnable call, or None. Caller holds the lock."""
+        if self._running >= self.max_concurrency:
+            return None
+
+        order = (INTERACTIVE, BACKGROUND)
+        if self._dispatched % BACKGROUND_SHARE == BACKGROUND_SHARE - 1:
+            order = (BACKGROUND, INTERACTIVE)
+
+        for priority in order:
+            tenants = self._queues[priority]
+            for _ in range(len(tenants)):
+                tenant, queue = next(iter(tenants.items()))
+                task = queue[0]
+                # The tenant goes to the back of the line whether or not it is served
+                tenants.move_to_end(tenant)
+                if task.limit is not None and self._in_flight.get(tenant, 0) >= task.limit:
+                    continue
+                queue.popleft()
+                if not queue:
+                    del tenants[tenant]
+                self._dispatched += 1
+                return task
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                    task = self._next_task()
+                self._running += 1
+                self._in_flight[task.tenant] = self._in_flight.get(task.tenant, 0) + 1
+
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    result = task.fn(*task.args, **task.kwargs)
+                except BaseException as e:
+                    task.future.set_exception(e)
+                else:
+                    task.future.set_result(result)
+            tenant = task.tenant
+            task = None  # don't keep the call's arguments alive while idle
+
+            with self._cond:
+                self._running -= 1
+                self._in_flight[tenant] -= 1
+                if not self._in_flight[tenant]:
+                    del self._in_flight[tenant]
+                # A freed slot may unblock a tenant that was at its limit
+                self._cond.notify_all()
+
+
+_scheduler: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """The process-wide scheduler, created on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler()
+        return _scheduler
+
+
+def configure(max_concurrency: int) -> FairScheduler:
+    """Set the process-wide cap on concurrent upstream calls (e.g. for batch runs)."""
+    scheduler = get_scheduler()
+    with scheduler._cond:
+        scheduler.max_concurrency = max(1, max_concurrency)
+        scheduler._cond.notify_all()
+    return scheduler
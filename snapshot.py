@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Binary Snapshot Format for Cached Garmin Histories
+
+Stores a user's daily series and per-day activity aggregates in a versioned
+binary file that is opened with mmap. Every field is a fixed-width,
+little-endian column, so the loader only parses a small header and hands out
+zero-copy memoryviews over the mapped file; nothing is decoded until a value
+is actually read.
+
+File layout (all integers little-endian):
+
+    header   '<4sHHIII'  magic b'DTWS', version, flags, daily count,
+                         activity count, metadata block length
+    daily    day[n] uint32 (date ordinal), flags[n] uint8 (bit 0: fetch error),
+             active[n], total[n], bmr[n] float64
+    activity day[m] uint32, type[m] uint32 (index into metadata 'types'),
+             count[m] uint32, calories[m] float64
+    metadata JSON object, zlib-compressed when header flag bit 0 is set
+
+Usage:
+    write_snapshot('jane.dtws', daily_stats, activity_aggregates)
+    with Snapshot('jane.dtws') as snap:
+        data = snap.to_daily_stats()
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+MAGIC = b'DTWS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+
+# Header flags
+FLAG_COMPRESSED_METADATA = 0x1
+
+# Daily record flags
+DAY_FLAG_ERROR = 0x1
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def _column_bytes(typecode: str, values: List[Any]) -> bytes:
+    column = array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_snapshot(
+    path: str,
+    daily: List[Dict[str, Any]],
+    activity_aggregates: Optional[List[Dict[str, Any]]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    compress: bool = True,
+) -> None:
+    """
+    Write a snapshot file atomically.
+
+    Args:
+        path: Destination file
+        daily: Daily stats as returned by get_daily_active_calories
+        activity_aggregates: Per-day activity totals as returned by
+            GarminDataExtractor.get_activity_aggregates
+        metadata: Extra JSON-serializable information to store (e.g. user, window)
+        compress: Whether to zlib-compress the metadata block
+    """
+    daily = sorted(daily, key=lambda d: d['date'])
+    activity_aggregates = activity_aggregates or []
+
+    types: List[str] = []
+    type_index: Dict[str, int] = {}
+    for aggregate in activity_aggregates:
+        if aggregate['type'] not in type_index:
+            type_index[aggregate['type']] = len(types)
+            types.append(aggregate['type'])
+
+    meta = dict(metadata or {})
+    meta['types'] = types
+    meta_block = json.dumps(meta, separators=(',', ':'), default=str).encode('utf-8')
+    flags = 0
+    if compress:
+        meta_block = zlib.compress(meta_block)
+        flags |= FLAG_COMPRESSED_METADATA
+
+    def ordinal(date_str: str) -> int:
+        return date.fromisoformat(date_str).toordinal()
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, flags, len(daily), len(activity_aggregates), len(meta_block)),
+        _column_bytes('I', [ordinal(d['date']) for d in daily]),
+        _column_bytes('B', [DAY_FLAG_ERROR if 'error' in d else 0 for d in daily]),
+        _column_bytes('d', [float(d.get('active_calories') or 0) for d in daily]),
+        _column_bytes('d', [float(d.get('total_calories') or 0) for d in daily]),
+        _column_bytes('d', [float(d.get('bmr_calories') or 0) for d in daily]),
+        _column_bytes('I', [ordinal(a['date']) for a in activity_aggregates]),
+        _column_bytes('I', [type_index[a['type']] for a in activity_aggregates]),
+        _column_bytes('I', [int(a.get('count', 1)) for a in activity_aggregates]),
+        _column_bytes('d', [float(a['calories']) for a in activity_aggregates]),
+        meta_block,
+    ]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for part in parts:
+            f.write(part)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._views: List[Any] = []
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._file = open(path, 'rb')
+        try:
+            self._map()
+        except BaseException:
+            # Never leave the file open behind a snapshot the caller never got
+            self.close()
+            raise
+
+    def _map(self) -> None:
+        """Map the file and set up the header fields and column views."""
+        # mmap refuses empty files, so short files are rejected before mapping
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            raise ValueError(f"{self.path} is not a snapshot file (too short)")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        self._views.append(self._buffer)
+
+        magic, version, self.flags, self.daily_count, self.activity_count, meta_length = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a snapshot file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in {self.path}")
+        self.version = version
+
+        offset = HEADER.size
+        n, m = self.daily_count, self.activity_count
+        self.days, offset = self._column(offset, 'I', n)
+        self.day_flags, offset = self._column(offset, 'B', n)
+        self.active_calories, offset = self._column(offset, 'd', n)
+        self.total_calories, offset = self._column(offset, 'd', n)
+        self.bmr_calories, offset = self._column(offset, 'd', n)
+        self.activity_days, offset = self._column(offset, 'I', m)
+        self.activity_types, offset = self._column(offset, 'I', m)
+        self.activity_counts, offset = self._column(offset, 'I', m)
+        self.activity_calories, offset = self._column(offset, 'd', m)
+        self._meta_range = (offset, offset + meta_length)
+        if self._meta_range[1] > len(self._mmap):
+            raise ValueError(f"{self.path} is truncated")
+
+    def _column(self, offset: int, typecode: str, count: int):
+        """Zero-copy view of one column (a byte-swapped copy on big-endian hosts)."""
+        size = array(typecode).itemsize * count
+        if offset + size > len(self._buffer):
+            raise ValueError(f"{self.path} is truncated")
+        raw = self._buffer[offset:offset + size]
+        if _LITTLE_ENDIAN:
+            view = raw.cast(typecode)
+            self._views.extend((raw, view))
+            return view, offset + size
+        column = array(typecode)
+        column.frombytes(raw)
+        column.byteswap()
+        raw.release()
+        return column, offset + size
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadata block, decoded on first access."""
+        if self._metadata is None:
+            start, end = self._meta_range
+            block = self._mmap[start:end]
+            if self.flags & FLAG_COMPRESSED_METADATA:
+                block = zlib.decompress(block)
+            self._metadata = json.loads(block) if block else {}
+        return self._metadata
+
+    def __len__(self) -> int:
+        return self.daily_count
+
+    def daily_record(self, index: int) -> Dict[str, Any]:
+        """One day in the usual get_daily_active_calories dictionary shape."""
+        record = {
+            'date': date.fromordinal(self.days[index]).isoformat(),
+            'active_calories': self.active_calories[index],
+            'total_calories': self.total_calories[index],
+            'bmr_calories': self.bmr_calories[index],
+        }
+        if self.day_flags[index] & DAY_FLAG_ERROR:
+            record['error'] = 'not fetched'
+        return record
+
+    def to_daily_stats(self) -> List[Dict[str, Any]]:
+        """Materialize the whole daily series as a list of dictionaries."""
+        return [self.daily_record(i) for i in range(self.daily_count)]
+
+    def activity_aggregates(self) -> List[Dict[str, Any]]:
+        """Materialize the per-day activity totals."""
+        types = self.metadata.get('types', [])
+        return [
+            {
+                'date': date.fromordinal(self.activity_days[i]).isoformat(),
+                'type': types[self.activity_types[i]],
+                'calories': self.activity_calories[i],
+                'count': self.activity_counts[i],
+            }
+            for i in range(self.activity_count)
+        ]
+
+    def close(self) -> None:
+        """Release every view and unmap the file."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None and not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
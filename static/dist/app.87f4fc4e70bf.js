@@ -0,0 +1,484 @@
+// TrainingPeaks-style Chart.js integration for Do The Work App
+
+// Chart currently drawn on the canvas, replaced when the chart mode changes
+let activeChart = null;
+
+function initChart(data) {
+    const ctx = document.getElementById('caloriesChart');
+    if (!ctx) {
+        console.error('Chart canvas not found');
+        return;
+    }
+    if (activeChart) {
+        activeChart.destroy();
+    }
+
+    // TrainingPeaks-inspired color scheme
+    const primaryColor = '#0077be';
+    const primaryGradient = ctx.getContext('2d').createLinearGradient(0, 0, 0, 300);
+    primaryGradient.addColorStop(0, 'rgba(0, 119, 190, 0.8)');
+    primaryGradient.addColorStop(1, 'rgba(0, 119, 190, 0.2)');
+
+    const chart = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: data.labels,
+            datasets: [{
+                label: 'Average Daily Active Calories',
+                data: data.values,
+                backgroundColor: primaryGradient,
+                borderColor: primaryColor,
+                borderWidth: 2,
+                borderRadius: 6,
+                borderSkipped: false,
+                hoverBackgroundColor: 'rgba(0, 119, 190, 0.9)',
+                hoverBorderColor: primaryColor,
+                hoverBorderWidth: 3
+            }, {
+                type: 'line',
+                label: 'Annual Average',
+                data: Array(data.labels.length).fill(data.annualAverage),
+                borderColor: '#ff6b35',
+                backgroundColor: 'rgba(255, 107, 53, 0.1)',
+                borderWidth: 2,
+                borderDash: [5, 5],
+                pointRadius: 0,
+                pointHoverRadius: 0,
+                fill: false,
+                tension: 0
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: {
+                intersect: false,
+                mode: 'index'
+            },
+            plugins: {
+                legend: {
+                    display: true,
+                    position: 'top',
+                    align: 'center',
+                    labels: {
+                        usePointStyle: true,
+                        padding: 20,
+                        font: {
+                            size: 12,
+                            family: 'Inter'
+                        },
+                        color: '#64748b',
+                        filter: function(legendItem, chartData) {
+                            // Only show the Annual Average legend
+                            return legendItem.text === 'Annual Average';
+                        },
+                        generateLabels: function(chart) {
+                            return [{
+                                text: `Annual Average: ${Math.round(data.annualAverage)} cal/day`,
+                                fillStyle: '#ff6b35',
+                                strokeStyle: '#ff6b35',
+                                lineWidth: 2,
+                                lineDash: [5, 5],
+                                pointStyle: 'line'
+                            }];
+                        }
+                    }
+                },
+                tooltip: {
+                    backgroundColor: 'rgba(30, 41, 59, 0.95)',
+                    titleColor: '#ffffff',
+                    bodyColor: '#ffffff',
+                    borderColor: '#0077be',
+                    borderWidth: 1,
+                    cornerRadius: 8,
+                    displayColors: false,
+                    titleFont: {
+                        size: 14,
+                        weight: '600'
+                    },
+                    bodyFont: {
+                        size: 13
+                    },
+                    padding: 12,
+                    callbacks: {
+                        title: function(tooltipItems) {
+                            return tooltipItems[0].label;
+                        },
+                        label: function(context) {
+                            if (context.dataset.label === 'Annual Average') {
+                                return 'Annual Average: ' + Math.round(context.parsed.y) + ' calories/day';
+                            }
+                            return Math.round(context.parsed.y) + ' calories/day';
+                        }
+                    }
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        color: 'rgba(226, 232, 240, 0.6)',
+                        drawBorder: false
+                    },
+                    ticks: {
+                        color: '#64748b',
+                        font: {
+                            size: 12,
+                            family: 'Inter'
+                        },
+                        padding: 8,
+                        callback: function(value, index, values) {
+                            return Math.round(value);
+                        }
+                    },
+                    title: {
+                        display: true,
+                        text: 'Active Calories per Day',
+                        color: '#475569',
+                        font: {
+                            size: 13,
+                            weight: '500',
+                            family: 'Inter'
+                        },
+                        padding: {
+                            top: 20
+                        }
+                    }
+                },
+                x: {
+                    grid: {
+                        display: false
+                    },
+                    ticks: {
+                        color: '#64748b',
+                        font: {
+                            size: 12,
+                            family: 'Inter'
+                        },
+                        maxRotation: 45,
+                        minRotation: 0
+                    }
+                }
+            },
+            layout: {
+                padding: {
+                    top: 10,
+                    bottom: 10
+                }
+            },
+            animation: {
+                duration: 1000,
+                easing: 'easeOutQuart'
+            },
+            elements: {
+                bar: {
+                    borderWidth: 2
+                }
+            }
+        }
+    });
+
+    activeChart = chart;
+    bindChartHover(ctx);
+    
+    return chart;
+}
+
+// Add chart hover effects (once per canvas, for whichever chart is active)
+function bindChartHover(ctx) {
+    if (ctx.dataset.hoverBound) {
+        return;
+    }
+    ctx.dataset.hoverBound = 'true';
+    ctx.addEventListener('mousemove', function(event) {
+        if (!activeChart) {
+            return;
+        }
+        const points = activeChart.getElementsAtEventForMode(event, 'nearest', { intersect: false }, true);
+        
+        if (points.length) {
+            ctx.style.cursor = 'pointer';
+        } else {
+            ctx.style.cursor = 'default';
+        }
+    });
+}
+
+// Decode a base64 array of little-endian int32 deltas (see chart_data.py)
+function decodeDeltas(encoded) {
+    const binary = atob(encoded);
+    const view = new DataView(new ArrayBuffer(binary.length));
+    for (let i = 0; i < binary.length; i++) {
+        view.setUint8(i, binary.charCodeAt(i));
+    }
+    const values = new Array(binary.length / 4);
+    let total = 0;
+    for (let i = 0; i < values.length; i++) {
+        total += view.getInt32(i * 4, true);
+        values[i] = total;
+    }
+    return values;
+}
+
+// Daily or rolling-average line chart from a compact /api/chart payload
+function initDailyChart(payload) {
+    const ctx = document.getElementById('caloriesChart');
+    if (!ctx) {
+        return;
+    }
+    if (activeChart) {
+        activeChart.destroy();
+    }
+
+    const offsets = payload.count ? decodeDeltas(payload.x) : [];
+    const values = payload.count ? decodeDeltas(payload.y) : [];
+    const [year, month, day] = (payload.start || '1970-01-01').split('-').map(Number);
+    const labels = offsets.map(offset => new Date(Date.UTC(year, month - 1, day + offset))
+        .toLocaleDateString('en-GB', { day: 'numeric', month: 'short', year: '2-digit', timeZone: 'UTC' }));
+    const titles = {
+        daily: 'Daily Active Calories',
+        rolling: '7-Day Average',
+        fitness: 'Fitness (42-Day Load)'
+    };
+    const title = titles[payload.mode] || titles.daily;
+
+    activeChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+            labels: labels,
+            datasets: [{
+                label: title,
+                data: values,
+                borderColor: '#0077be',
+                backgroundColor: 'rgba(0, 119, 190, 0.15)',
+                borderWidth: 2,
+                pointRadius: 0,
+                pointHoverRadius: 4,
+                fill: true,
+                tension: 0.2
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            animation: false,
+            interaction: {
+                intersect: false,
+                mode: 'index'
+            },
+            plugins: {
+                legend: {
+                    display: false
+                },
+                tooltip: {
+                    backgroundColor: 'rgba(30, 41, 59, 0.95)',
+                    displayColors: false,
+                    padding: 12,
+                    callbacks: {
+                        label: function(context) {
+                            return title + ': ' + Math.round(context.parsed.y) + ' cal/day';
+                        }
+                    }
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    grid: {
+                        color: 'rgba(226, 232, 240, 0.6)'
+                    },
+                    ticks: {
+                        color: '#64748b'
+                    }
+                },
+                x: {
+                    grid: {
+                        display: false
+                    },
+                    ticks: {
+                        color: '#64748b',
+                        autoSkip: true,
+                        maxTicksLimit: 8,
+                        maxRotation: 0
+                    }
+                }
+            }
+        }
+    });
+    bindChartHover(ctx);
+}
+
+// Monthly / daily / rolling toggle and zoom range buttons under the chart title
+function initChartControls(monthlyData) {
+    const controls = document.querySelector('.chart-controls');
+    const canvas = document.getElementById('caloriesChart');
+    if (!controls || !canvas) {
+        return;
+    }
+    const rangeGroup = controls.querySelector('.chart-range-group');
+    const payloadCache = new Map();
+    let mode = 'monthly';
+    let rangeDays = 365;
+    // Only the latest render may draw, so slow responses for earlier clicks are dropped
+    let latestRender = 0;
+
+    function setActive(selector, button) {
+        controls.querySelectorAll(selector).forEach(b => b.classList.toggle('active', b === button));
+    }
+
+    function render() {
+        const renderId = ++latestRender;
+        rangeGroup.style.display = mode === 'monthly' ? 'none' : '';
+        if (mode === 'monthly') {
+            initChart(monthlyData);
+            return;
+        }
+        const start = new Date();
+        start.setDate(start.getDate() - rangeDays);
+        const width = Math.max(canvas.clientWidth, 100);
+        const url = `/api/chart?mode=${mode}&start=${start.toISOString().slice(0, 10)}&width=${width}`;
+        const cached = payloadCache.get(url);
+        const request = cached ? Promise.resolve(cached) : fetch(url).then(response => response.json());
+        request
+            .then(payload => {
+                if (payload.error) {
+                    throw new Error(payload.error);
+                }
+                payloadCache.set(url, payload);
+                if (renderId === latestRender) {
+                    initDailyChart(payload);
+                }
+            })
+            .catch(error => {
+                if (renderId === latestRender) {
+                    console.error('Chart data failed:', error);
+                }
+            });
+    }
+
+    controls.querySelectorAll('[data-mode]').forEach(button => {
+        button.addEventListener('click', function() {
+            mode = button.dataset.mode;
+            setActive('[data-mode]', button);
+            render();
+        });
+    });
+    controls.querySelectorAll('[data-range]').forEach(button => {
+        button.addEventListener('click', function() {
+            rangeDays = Number(button.dataset.range);
+            setActive('[data-range]', button);
+            render();
+        });
+    });
+    rangeGroup.style.display = 'none';
+}
+
+// Heart-rate zone breakdown, fetched after the page so it never delays the dashboard
+function initZoneBreakdown() {
+    const container = document.getElementById('zone-breakdown');
+    if (!container) return;
+
+    fetch('/api/zones?days=30')
+        .then(response => response.json())
+        .then(summary => {
+            if (summary.error || !summary.days_with_data) {
+                container.textContent = summary.error || 'No heart-rate data in the last 30 days.';
+                return;
+            }
+            const total = summary.zones.reduce((sum, zone) => sum + zone.minutes, 0);
+            container.innerHTML = '';
+            summary.zones.slice().reverse().forEach(zone => {
+                const pct = total > 0 ? zone.minutes / total * 100 : 0;
+                const item = document.createElement('div');
+                item.className = 'activity-item';
+                item.innerHTML = `
+                    <div class="activity-type"></div>
+                    <div class="progress-bar"><div class="progress-bar-fill" style="width: ${pct.toFixed(1)}%"></div></div>
+                    <div class="activity-stats">
+                        <span class="activity-calories">${formatNumber(Math.round(zone.minutes))} min</span>
+                        <span class="activity-percent">${pct.toFixed(1)}% · from ${zone.min_bpm} bpm</span>
+                    </div>`;
+                item.querySelector('.activity-type').textContent = zone.zone;
+                container.appendChild(item);
+            });
+        })
+        .catch(() => {
+            container.textContent = 'Heart-rate data is unavailable right now.';
+        });
+}
+
+// Utility function to format numbers with commas
+function formatNumber(num) {
+    return num.toString().replace(/\B(?=(\d{3})+(?!\d))/g, ",");
+}
+
+// Animate stat cards on load
+document.addEventListener('DOMContentLoaded', function() {
+    const statCards = document.querySelectorAll('.stat-card');
+    
+    statCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+        
+        setTimeout(() => {
+            card.style.transition = 'opacity 0.6s ease, transform 0.6s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 150);
+    });
+
+    // Animate chart section
+    const chartSection = document.querySelector('.chart-section');
+    if (chartSection) {
+        chartSection.style.opacity = '0';
+        chartSection.style.transform = 'translateY(30px)';
+        
+        setTimeout(() => {
+            chartSection.style.transition = 'opacity 0.8s ease, transform 0.8s ease';
+            chartSection.style.opacity = '1';
+            chartSection.style.transform = 'translateY(0)';
+        }, 300);
+    }
+
+    // Animate insights cards
+    const insightCards = document.querySelectorAll('.insight-card');
+    insightCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+        
+        setTimeout(() => {
+            card.style.transition = 'opacity 0.6s ease, transform 0.6s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, 600 + (index * 100));
+    });
+});
+
+// Form validation and enhancement
+document.addEventListener('DOMContentLoaded', function() {
+    const loginForm = document.querySelector('.login-form');
+    if (loginForm) {
+        const submitButton = loginForm.querySelector('button[type="submit"]');
+        const originalText = submitButton.textContent;
+        
+        loginForm.addEventListener('submit', function() {
+            submitButton.disabled = true;
+            submitButton.textContent = 'Connecting...';
+            submitButton.style.opacity = '0.7';
+            
+            // Re-enable after 5 seconds as fallback
+            setTimeout(() => {
+                submitButton.disabled = false;
+                submitButton.textContent = originalText;
+                submitButton.style.opacity = '1';
+            }, 5000);
+        });
+    }
+});
+
+// Add loading state for dashboard
+window.addEventListener('beforeunload', function() {
+    const body = document.body;
+    body.style.opacity = '0.7';
+    body.style.pointerEvents = 'none';
+}); 
\ No newline at end of file
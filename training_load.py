@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Incremental Training-Load Model for Do The Work App
+
+Tracks exponentially weighted averages of daily active calories in the style
+of TrainingPeaks' performance chart:
+
+    ATL (acute load, "fatigue")  - 7-day time constant
+    CTL (chronic load, "fitness") - 42-day time constant
+    TSB (balance, "form")         - CTL minus ATL
+
+The model is running state: folding in a new day costs O(1) regardless of
+how much history is behind it, and gaps are decayed in closed form. State is
+persisted per user, so each dashboard load only ingests the days that are
+new since the last visit.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+ATL_DAYS = 7
+CTL_DAYS = 42
+
+# Days of (date, ATL, CTL) history kept for the fitness chart
+HISTORY_LIMIT = 3 * 365
+
+# Where per-user state is kept unless TRAINING_LOAD_DIR is set. The temp dir
+# is not persistent on serverless hosts such as Vercel, where each instance
+# starts empty and models are rebuilt from Garmin data on first use.
+DEFAULT_STORE_DIR = os.path.join(tempfile.gettempdir(), 'do-the-work', 'training-load')
+
+
+def _decay(days: int) -> float:
+    """Per-day EWMA weight for a time constant in days."""
+    return 1.0 - math.exp(-1.0 / days)
+
+
+class TrainingLoadModel:
+    """Running ATL/CTL state for one user."""
+
+    def __init__(self, atl: float = 0.0, ctl: float = 0.0, last_date: Optional[str] = None,
+                 history: Optional[List[List[Any]]] = None):
+        self.atl = atl
+        self.ctl = ctl
+        self.last_date = last_date
+        self.history: List[List[Any]] = history or []
+
+    @property
+    def tsb(self) -> float:
+        """Training stress balance ("form"): fitness minus fatigue."""
+        return self.ctl - self.atl
+
+    def update(self, date_str: str, load: float) -> bool:
+        """
+        Fold one day's load into the model in constant time.
+
+        Days already covered by the model are ignored. Days skipped since the
+        last update count as zero load.
+
+        Returns:
+            True if the day was applied
+        """
+        day = date.fromisoformat(date_str).toordinal()
+        if self.last_date is not None:
+            gap = day - date.fromisoformat(self.last_date).toordinal()
+            if gap <= 0:
+                return False
+            if gap > 1:
+                self.atl *= (1.0 - _decay(ATL_DAYS)) ** (gap - 1)
+                self.ctl *= (1.0 - _decay(CTL_DAYS)) ** (gap - 1)
+
+        self.atl += (load - self.atl) * _decay(ATL_DAYS)
+        self.ctl += (load - self.ctl) * _decay(CTL_DAYS)
+        self.last_date = date_str
+
+        self.history.append([date_str, round(self.atl, 1), round(self.ctl, 1)])
+        # Trim in batches so the amortized cost per day stays constant
+        if len(self.history) > HISTORY_LIMIT + 64:
+            del self.history[:len(self.history) - HISTORY_LIMIT]
+        return True
+
+    def ingest(self, daily: List[Dict[str, Any]], through: Optional[str] = None) -> int:
+        """
+        Apply every day newer than the model's last date.
+
+        Stops at the first day that failed to fetch, so that day is applied
+        on a later load instead of being decayed over as a rest day. Cached
+        fallback days are real data and are applied.
+
+        Args:
+            daily: Daily stats as returned by get_daily_active_calories
+            through: Last date to apply (YYYY-MM-DD); use yesterday to keep
+                today's partial total out of the running state
+
+        Returns:
+            Number of days applied
+        """
+        applied = 0
+        for day in sorted(daily, key=lambda d: d['date']):
+            if self.last_date is not None and day['date'] <= self.last_date:
+                continue
+            if through is not None and day['date'] > through:
+                break
+            if 'error' in day:
+                break
+            if self.update(day['date'], float(day.get('active_calories') or 0)):
+                applied += 1
+        return applied
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'atl': self.atl,
+            'ctl': self.ctl,
+            'last_date': self.last_date,
+            'history': self.history,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TrainingLoadModel':
+        return cls(
+            atl=float(data.get('atl', 0.0)),
+            ctl=float(data.get('ctl', 0.0)),
+            last_date=data.get('last_date'),
+            history=data.get('history') or [],
+        )
+
+
+class TrainingLoadStore:
+    """Persists one TrainingLoadModel per user as a small JSON file."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get('TRAINING_LOAD_DIR') or DEFAULT_STORE_DIR
+
+    def _path(self, user: str) -> str:
+        # Usernames are hashed to keep them out of directory listings. This is
+        # not anonymization: anyone who can guess a username can hash it too.
+        key = hashlib.sha256(user.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, user: str) -> TrainingLoadModel:
+        """The user's saved model, or an empty one."""
+        try:
+            with open(self._path(user)) as f:
+                return TrainingLoadModel.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return TrainingLoadModel()
+
+    def save(self, user: str, model: TrainingLoadModel) -> None:
+        """Write the model atomically; concurrent saves for a user never mix, the last one wins."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(user)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(model.to_dict(), f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def update(self, user: str, daily: List[Dict[str, Any]], through: Optional[str] = None) -> TrainingLoadModel:
+        """Load the user's model, fold in new days, and save it if anything changed."""
+        model = self.load(user)
+        if model.ingest(daily, through=through):
+            self.save(user, model)
+        return model